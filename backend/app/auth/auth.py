@@ -1,42 +1,113 @@
 import os
-from fastapi import Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
-from typing import Optional
-from app.database.database import get_db
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+import jwt
+from fastapi import HTTPException, status, Header
+from sqlalchemy import select
+from typing import Optional, Tuple
+from app.database.database import AsyncSessionLocal
 from app.models.user import User
+from app.utils.auth import decode_token
+from app.utils.cache import CacheNamespace, ResponseCache
+
+AUTH_PRINCIPAL_CACHE_TTL = float(os.environ.get("AUTH_PRINCIPAL_CACHE_TTL", 60))
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 10000))
+
+principal_cache = ResponseCache(CacheNamespace("principals"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    is_active: bool
+
+
+class VerifiedTokenCache:
+    # Tokens are immutable and carry their own expiry, so a token that has
+    # passed the signature check once only needs its exp re-checked.
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[Principal]:
+        item = self._entries.get(token)
+        if item is None:
+            return None
+        principal, expires_at = item
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def set(self, token: str, principal: Principal, expires_at: float) -> None:
+        self._entries[token] = (principal, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+async def _load_principal(user_id: int) -> Optional[dict]:
+    # The fetch can be shared by coalesced callers and outlive the request
+    # that started it, so it uses its own session, not the caller's.
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User.id, User.username, User.is_active).where(User.id == user_id)
+        )
+        row = result.first()
+    if row is None:
+        return None
+    return asdict(Principal(id=row.id, username=row.username, is_active=row.is_active))
+
+
+async def resolve_principal(user_id: int) -> Optional[Principal]:
+    principal = await principal_cache.get_or_fetch(
+        str(user_id),
+        lambda: _load_principal(user_id),
+        ttl=AUTH_PRINCIPAL_CACHE_TTL,
+    )
+    return Principal(**principal) if principal is not None else None
+
+
+def _credentials_error(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 
 async def get_current_user(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     if authorization is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing authorization header",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    print(f"Auth header received: {authorization}")
+        raise _credentials_error("Missing authorization header")
     
     parts = authorization.split()
     if len(parts) != 2 or parts[0].lower() != "bearer":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication scheme, use Bearer token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_error("Invalid authentication scheme, use Bearer token")
     
     token = parts[1]
-    print(f"Looking up user with token: {token}")
-    
-    user = db.query(User).filter(User.username == token).first()
-    
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Invalid or expired token: {token}",
-            headers={"WWW-Authenticate": "Bearer"},
+    principal = verified_tokens.get(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = decode_token(token)
+        principal = Principal(
+            id=int(payload["sub"]),
+            username=payload.get("username", ""),
+            is_active=payload.get("active", True),
         )
-    
-    print(f"User found: {user.username}, ID: {user.id}")
-    return user
+    except (jwt.PyJWTError, KeyError, ValueError):
+        raise _credentials_error("Invalid or expired token")
+    if not principal.is_active:
+        raise _credentials_error("Inactive user")
+
+    verified_tokens.set(token, principal, payload["exp"])
+    return principal
@@ -1,11 +1,127 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import REGISTRY
+from app.auth.auth import principal_cache
+from app.database.database import async_engine, engine
+from app.middleware.compression import CompressionMiddleware, compressed_bodies
+from app.middleware.etag import ETagMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
 from app.routes import tracks, albums, users, search, deezer, favorites, history
+from app.utils.cache import close_cache_backend
+from app.utils.catalog_index import load_catalog_index
+from app.utils.history_partitions import (
+    HISTORY_PARTITION_MAINTENANCE_INTERVAL,
+    run_history_partition_maintenance,
+)
+from app.utils.history_writer import HISTORY_WRITE_BEHIND, history_writer
+from app.utils.deezer import (
+    DEEZER_CACHE_STALE_TTL,
+    DEEZER_CACHE_TTLS,
+    GENRE_ALBUMS_REFRESH_INTERVAL,
+    deezer_breakers,
+    deezer_cache,
+    get_deezer_client,
+    close_deezer_client,
+    run_genre_album_refresher,
+)
+from app.utils.profiling import PROFILING_ENABLED, install_query_profiler
+from app.utils.track_metadata import wait_for_metadata_refreshes
+from app.utils.metrics import (
+    METRICS_ENABLED,
+    BreakerCollector,
+    HistoryWriterCollector,
+    PoolCollector,
+    cache_collector,
+    instrument_pool,
+    render_metrics,
+)
+
+CATALOG_INDEX_ENABLED = os.environ.get("CATALOG_INDEX_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+CATALOG_HTTP_MAX_AGE = int(os.environ.get("CATALOG_HTTP_MAX_AGE", 60))
+
+logger = logging.getLogger(__name__)
+
+
+def _deezer_cache_control(ttl_name: str) -> str:
+    return (
+        f"public, max-age={int(DEEZER_CACHE_TTLS[ttl_name])}, "
+        f"stale-while-revalidate={int(DEEZER_CACHE_STALE_TTL)}"
+    )
+
+
+_catalog_cache_control = f"public, max-age={CATALOG_HTTP_MAX_AGE}"
+_per_user_cache_control = "private, no-cache"
+
+CACHE_CONTROL = {
+    "/deezer/tracks": _deezer_cache_control("chart"),
+    "/deezer/tracks/{track_id}": _deezer_cache_control("track"),
+    "/deezer/albums/{album_id}": _deezer_cache_control("album"),
+    "/deezer/search": _deezer_cache_control("chart"),
+    "/deezer/genres": _deezer_cache_control("genre_albums"),
+    "/deezer/genre/{genre_name}/albums": _deezer_cache_control("genre_albums"),
+    "/deezer/custom-albums": _deezer_cache_control("genre_albums"),
+    "/deezer/cache/stats": "no-store",
+    "/deezer/upstream/stats": "no-store",
+    "/tracks": _catalog_cache_control,
+    "/tracks/{track_id}": _catalog_cache_control,
+    "/albums": _catalog_cache_control,
+    "/albums/{album_id}": _catalog_cache_control,
+    "/search": _catalog_cache_control,
+    "/search/suggest": _catalog_cache_control,
+    "/favorites": _per_user_cache_control,
+    "/history": _per_user_cache_control,
+    "/users": _per_user_cache_control,
+    "/users/{user_id}": _per_user_cache_control,
+    "/metrics": "no-store",
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_deezer_client()
+    if CATALOG_INDEX_ENABLED:
+        try:
+            await asyncio.to_thread(load_catalog_index)
+        except Exception:
+            logger.exception("Failed to build the catalog search index")
+    if HISTORY_WRITE_BEHIND:
+        history_writer.start()
+    background_tasks = []
+    if GENRE_ALBUMS_REFRESH_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(run_genre_album_refresher()))
+    if HISTORY_PARTITION_MAINTENANCE_INTERVAL > 0:
+        background_tasks.append(
+            asyncio.create_task(run_history_partition_maintenance())
+        )
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await history_writer.stop()
+        await close_deezer_client()
+        await wait_for_metadata_refreshes()
+        await close_cache_backend()
+        await async_engine.dispose()
+
 
 app = FastAPI(
     title="PlayPod API",
     description="Nfactorial Incubator 2025",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -15,6 +131,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+# Wraps CompressionMiddleware, so ETags are computed over the encoded body
+# and each content coding gets its own strong validator.
+app.add_middleware(ETagMiddleware, cache_control=CACHE_CONTROL)
+
+if PROFILING_ENABLED:
+    install_query_profiler()
+    app.add_middleware(ProfilingMiddleware)
+
+if METRICS_ENABLED:
+    # Added last so it is outermost and its latency covers the other
+    # middleware too.
+    app.add_middleware(MetricsMiddleware)
+    pools = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+    for engine_name, pool in pools.items():
+        instrument_pool(pool, engine_name)
+    REGISTRY.register(PoolCollector(pools))
+    cache_collector.watch("deezer", deezer_cache.stats)
+    cache_collector.watch("principals", principal_cache.stats)
+    cache_collector.watch("compressed_bodies", compressed_bodies.stats)
+    REGISTRY.register(cache_collector)
+    REGISTRY.register(HistoryWriterCollector(history_writer))
+    REGISTRY.register(BreakerCollector("deezer", deezer_breakers))
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_metrics()
+        return Response(body, media_type=content_type)
+
 
 app.include_router(tracks.router, prefix="/api", tags=["tracks"])
 app.include_router(albums.router, prefix="/api", tags=["albums"])
@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import anyio
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 5))
+COMPRESSION_CACHE_BYTES = int(
+    os.environ.get("COMPRESSION_CACHE_BYTES", 16 * 1024 * 1024)
+)
+COMPRESSION_OFFLOAD_SIZE = int(
+    os.environ.get("COMPRESSION_OFFLOAD_SIZE", 256 * 1024)
+)
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+MAX_BUFFERED_BODY = 8 * 1024 * 1024
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    preferences = []
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            preferences.append((quality, name.strip().lower()))
+    preferences.sort(key=lambda item: -item[0])
+    return [name for _, name in preferences]
+
+
+class CompressedBodyCache:
+    # Identical bodies (cached Deezer payloads, unchanged pages) hash to the
+    # same digest, so hot responses are compressed once and then served from
+    # here. Bounded by the total size of the compressed bodies.
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(encoding: str, body: bytes) -> Tuple[str, bytes]:
+        return (encoding, hashlib.blake2b(body, digest_size=16).digest())
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        compressed = self._entries.get(key)
+        if compressed is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return compressed
+
+    def put(self, key: Tuple[str, bytes], compressed: bytes) -> None:
+        if len(compressed) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = compressed
+        self._bytes += len(compressed)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def get_or_compress(self, encoding: str, body: bytes) -> bytes:
+        key = self.key(encoding, body)
+        compressed = self.get(key)
+        if compressed is None:
+            compressed = compress(encoding, body)
+            self.put(key, compressed)
+        return compressed
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output deterministic, so content-hash ETags
+    # computed over the compressed body stay stable.
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+compressed_bodies = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        content_types: Iterable[str] = COMPRESSIBLE_TYPES,
+        cache: CompressedBodyCache = compressed_bodies,
+        offload_size: int = COMPRESSION_OFFLOAD_SIZE,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.cache = cache
+        self.offload_size = offload_size
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def _choose_encoding(self, scope: Scope) -> Optional[str]:
+        for name in accepted_encodings(Headers(scope=scope).get("accept-encoding")):
+            if name in self.encodings:
+                return name
+            if name == "*":
+                return self.encodings[0]
+        return None
+
+    async def _compress(self, encoding: str, body: bytes) -> bytes:
+        if len(body) < self.offload_size:
+            return self.cache.get_or_compress(encoding, body)
+        # Hashing and compressing a large body would stall the event loop,
+        # so both run on a worker thread; the cache is only touched here.
+        key = await anyio.to_thread.run_sync(self.cache.key, encoding, body)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = await anyio.to_thread.run_sync(compress, encoding, body)
+            self.cache.put(key, compressed)
+        return compressed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(scope)
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, size, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                headers = MutableHeaders(scope=start)
+                if "content-encoding" in headers or not headers.get(
+                    "content-type", ""
+                ).startswith(self.content_types):
+                    passthrough = True
+                    await send(start)
+                    return
+                # Every representation of a compressible type varies by
+                # Accept-Encoding, including ones sent uncompressed.
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is None:
+                    passthrough = True
+                    await send(start)
+                return
+
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            more_body = message.get("more_body", False)
+            if size > MAX_BUFFERED_BODY or (not more_body and size < self.minimum_size):
+                passthrough = True
+                await send(start)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": b"".join(chunks),
+                        "more_body": more_body,
+                    }
+                )
+                return
+            if more_body:
+                return
+
+            body = await self._compress(encoding, b"".join(chunks))
+            headers = MutableHeaders(scope=start)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
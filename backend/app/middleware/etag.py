@@ -0,0 +1,124 @@
+import hashlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MAX_BUFFERED_BODY = 1024 * 1024
+
+
+def compute_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored.
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    # Buffers successful GET responses, tags them with a strong content-hash
+    # ETag and answers matching If-None-Match requests with an empty 304.
+    # Cache-Control is chosen by route template (without the /api prefix),
+    # so both mounts of a router share one policy.
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache_control: Optional[Dict[str, str]] = None,
+        max_body: int = MAX_BUFFERED_BODY,
+    ):
+        self.app = app
+        self.cache_control = cache_control or {}
+        self.max_body = max_body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, size, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                headers = MutableHeaders(scope=start)
+                if start["status"] != 200 or "etag" in headers:
+                    passthrough = True
+                    await send(start)
+                return
+
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > self.max_body:
+                passthrough = True
+                await send(start)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": b"".join(chunks),
+                        "more_body": message.get("more_body", False),
+                    }
+                )
+                return
+            if message.get("more_body", False):
+                return
+            await self._send_tagged(scope, send, start, b"".join(chunks), if_none_match)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _policy(self, scope: Scope) -> Optional[str]:
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path is None:
+            return None
+        if path.startswith("/api/"):
+            path = path[4:]
+        return self.cache_control.get(path)
+
+    async def _send_tagged(
+        self,
+        scope: Scope,
+        send: Send,
+        start: Message,
+        body: bytes,
+        if_none_match: Optional[str],
+    ) -> None:
+        headers = MutableHeaders(scope=start)
+        etag = compute_etag(body)
+        headers["etag"] = etag
+        policy = self._policy(scope)
+        # A route that set its own Cache-Control (e.g. no-store for a
+        # degraded result) knows better than the per-route default.
+        if policy is not None and "cache-control" not in headers:
+            headers["cache-control"] = policy
+            if policy.startswith("private"):
+                headers.add_vary_header("Authorization")
+
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            for name in ("content-length", "content-type", "content-encoding"):
+                if name in headers:
+                    del headers[name]
+            start["status"] = 304
+            await send(start)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
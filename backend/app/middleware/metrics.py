@@ -0,0 +1,51 @@
+import time
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    # Labels by route template rather than raw path, so /api/tracks/1 and
+    # /api/tracks/2 share a series. Label children are cached because
+    # Histogram.labels() costs more than the observation itself, and the
+    # in-flight gauge reads a plain counter at scrape time instead of taking
+    # the gauge's lock twice per request.
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.in_flight = 0
+        self._children: Dict[Tuple[str, str, str], object] = {}
+        HTTP_REQUESTS_IN_FLIGHT.set_function(lambda: self.in_flight)
+
+    def _histogram(self, method: str, route: str, status: str):
+        key = (method, route, status)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = HTTP_REQUEST_DURATION.labels(*key)
+        return child
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight -= 1
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self._histogram(scope["method"], route, str(status)).observe(elapsed)
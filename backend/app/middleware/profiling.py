@@ -0,0 +1,38 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.profiling import PROFILING_SAMPLE_RATE, current_profile, start_profile
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    # Attaches a RequestProfile to a sampled share of requests. The query
+    # hooks and the Deezer client add to it through a context variable, and
+    # the totals go out as a Server-Timing header on the response.
+    def __init__(self, app: ASGIApp, sample_rate: float = PROFILING_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = start_profile(scope, self.sample_rate)
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timing = profile.server_timing()
+                MutableHeaders(scope=message).append("Server-Timing", timing)
+                logger.debug("%s: %s", profile.route, timing)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.set(None)
@@ -1,18 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 from app.database.database import Base
+from app.models.track_metadata import TrackMetadata
 
 
 class Favorite(Base):
     __tablename__ = "favorites"
+    __table_args__ = (
+        Index("ix_favorites_user_id_track_id", "user_id", "track_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    track_id = Column(String, index=True)
-    title = Column(String)
-    artist = Column(String)
-    audio_url = Column(String)
-    cover_image = Column(String)
-    duration = Column(Integer)
+    track_id = Column(String, ForeignKey("track_metadata.track_id"), index=True)
 
     user = relationship("User", back_populates="favorites")
+    track = relationship(TrackMetadata, lazy="joined", innerjoin=True)
+
+    title = association_proxy("track", "title")
+    artist = association_proxy("track", "artist")
+    audio_url = association_proxy("track", "audio_url")
+    cover_image = association_proxy("track", "cover_image")
+    duration = association_proxy("track", "duration")
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database.database import Base
+from app.models.track_metadata import TrackMetadata
 
 
 class History(Base):
@@ -9,12 +11,22 @@ class History(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    track_id = Column(String, index=True)
-    title = Column(String)
-    artist = Column(String)
-    audio_url = Column(String)
-    cover_image = Column(String)
-    duration = Column(Integer)
+    track_id = Column(String, ForeignKey("track_metadata.track_id"), index=True)
     played_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="history")
+    track = relationship(TrackMetadata, lazy="joined", innerjoin=True)
+
+    title = association_proxy("track", "title")
+    artist = association_proxy("track", "artist")
+    audio_url = association_proxy("track", "audio_url")
+    cover_image = association_proxy("track", "cover_image")
+    duration = association_proxy("track", "duration")
+
+
+Index(
+    "ix_history_user_id_played_at",
+    History.user_id,
+    History.played_at.desc(),
+    History.id.desc(),
+)
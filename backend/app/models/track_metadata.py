@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database.database import Base
+
+
+class TrackMetadata(Base):
+    __tablename__ = "track_metadata"
+
+    track_id = Column(String, primary_key=True)
+    title = Column(String)
+    artist = Column(String)
+    audio_url = Column(String)
+    cover_image = Column(String)
+    duration = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,21 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Set, Union
 
 from app.database.database import get_db
+from app.utils.pagination import build_page, decode_cursor, page_size
 from app.models.album import Album as AlbumModel
+from app.models.track import Track as TrackModel
 from app.schemas.album import Album, AlbumCreate, AlbumWithTracks
+from app.schemas.pagination import Page
+from app.schemas.track import Track
+from app.utils.catalog_index import KIND_ALBUM, catalog_index
+from app.utils.fast_json import json_response, rows_to_dicts, schema_columns
 
 router = APIRouter()
 
-@router.get("/albums", response_model=List[Album])
-def get_albums(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    albums = db.query(AlbumModel).offset(skip).limit(limit).all()
-    return albums
+ALBUM_INCLUDES = {"tracks"}
+
+
+def album_includes(
+    include: Optional[str] = Query(None, description="Comma-separated: tracks")
+) -> Set[str]:
+    requested = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = requested - ALBUM_INCLUDES
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}",
+        )
+    return requested
+
+
+def attach_tracks(db: Session, albums: List[dict]) -> None:
+    # One IN query for the whole page, the same batching selectinload does,
+    # instead of a lazy load per album.
+    tracks_by_album = defaultdict(list)
+    if albums:
+        rows = db.execute(
+            select(*schema_columns(Track, TrackModel))
+            .where(TrackModel.album_id.in_([album["id"] for album in albums]))
+            .order_by(TrackModel.album_id, TrackModel.id)
+        ).all()
+        for track in rows_to_dicts(rows, Track):
+            tracks_by_album[track["album_id"]].append(track)
+    for album in albums:
+        album["tracks"] = tracks_by_album[album["id"]]
+
+
+@router.get("/albums", response_model=Page[Union[AlbumWithTracks, Album]])
+def get_albums(
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    include: Set[str] = Depends(album_includes),
+    db: Session = Depends(get_db),
+):
+    query = select(*schema_columns(Album, AlbumModel))
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, (int,))
+        query = query.where(AlbumModel.id > last_id)
+    rows = db.execute(query.order_by(AlbumModel.id).limit(limit + 1)).all()
+    page = build_page(rows, limit, lambda row: (row.id,))
+    page["items"] = rows_to_dicts(page["items"], Album)
+    if "tracks" in include:
+        attach_tracks(db, page["items"])
+    return json_response(page)
 
 @router.get("/albums/{album_id}", response_model=AlbumWithTracks)
 def get_album(album_id: int, db: Session = Depends(get_db)):
-    album = db.query(AlbumModel).filter(AlbumModel.id == album_id).first()
+    album = (
+        db.query(AlbumModel)
+        .options(selectinload(AlbumModel.tracks))
+        .filter(AlbumModel.id == album_id)
+        .first()
+    )
     if album is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
     return album
@@ -26,6 +84,7 @@ def create_album(album: AlbumCreate, db: Session = Depends(get_db)):
     db.add(db_album)
     db.commit()
     db.refresh(db_album)
+    catalog_index.add(KIND_ALBUM, db_album.id, db_album.title, db_album.artist)
     return db_album
 
 @router.delete("/albums/{album_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -35,4 +94,5 @@ def delete_album(album_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
     db.delete(album)
     db.commit()
+    catalog_index.remove(KIND_ALBUM, album_id)
     return None
\ No newline at end of file
@@ -1,75 +1,162 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import Optional
+import asyncio
+import math
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from typing import Any, List, Optional, Tuple
+from app.schemas.deezer import DeezerBatch
 from app.utils.deezer import (
     get_deezer_chart_tracks,
     get_deezer_track,
-    get_deezer_album,
+    get_deezer_album_or_custom,
+    fetch_batch,
     search_deezer_tracks,
     search_deezer_albums,
     get_genre_albums,
     GENRES,
+    DEEZER_SEARCH_DEADLINE,
     DeezerAPIError,
+    DeezerNotFound,
+    DeezerUnavailable,
+    deezer_cache,
+    upstream_stats,
 )
+from app.utils.concurrency import gather_with_deadline
 from app.utils.responses import success_response
 
 router = APIRouter()
 
 
+def _upstream_error(error: DeezerAPIError) -> HTTPException:
+    # An open circuit or a full rate-limit queue is a deliberate fast
+    # failure, so clients are told when to come back.
+    if isinstance(error, DeezerUnavailable):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(error),
+            headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+        )
+    if isinstance(error, DeezerNotFound):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(error))
+    return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(error))
+
+
+def _batch_items(results: List[Tuple[int, Any]]) -> List[dict]:
+    # Deezer's error bodies are already raised by the client, so a failed id
+    # always arrives as an exception and maps the same way as a single fetch.
+    items = []
+    for item_id, result in results:
+        if isinstance(result, DeezerAPIError):
+            error = _upstream_error(result)
+            item_error = {"status": error.status_code, "detail": error.detail}
+            if isinstance(result, DeezerUnavailable):
+                item_error["retry_after"] = int(error.headers["Retry-After"])
+            items.append({"id": item_id, "error": item_error})
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            items.append({"id": item_id, "data": result})
+    return items
+
+
 @router.get("/deezer/tracks")
-def live_tracks(limit: int = 10):
+async def live_tracks(limit: int = 10):
     try:
-        data = get_deezer_chart_tracks(limit)
+        data = await get_deezer_chart_tracks(limit)
         return success_response(data=data)
     except DeezerAPIError as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        raise _upstream_error(e)
 
 
 @router.get("/deezer/tracks/{track_id}")
-def live_track_detail(track_id: int):
+async def live_track_detail(track_id: int):
     try:
-        data = get_deezer_track(track_id)
+        data = await get_deezer_track(track_id)
         return success_response(data=data)
     except DeezerAPIError as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        raise _upstream_error(e)
+
+
+@router.post("/deezer/tracks:batch")
+async def live_tracks_batch(batch: DeezerBatch):
+    results = await fetch_batch(batch.ids, get_deezer_track)
+    return success_response(data=_batch_items(results))
 
 
 @router.get("/deezer/albums/{album_id}")
-def live_album_detail(album_id: int):
+async def live_album_detail(album_id: int):
     try:
-        data = get_deezer_album(album_id)
+        data = await get_deezer_album_or_custom(album_id)
         return success_response(data=data)
     except DeezerAPIError as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        raise _upstream_error(e)
+
+
+@router.post("/deezer/albums:batch")
+async def live_albums_batch(batch: DeezerBatch):
+    results = await fetch_batch(batch.ids, get_deezer_album_or_custom)
+    return success_response(data=_batch_items(results))
 
 
 @router.get("/deezer/search")
-def live_search(q: str, limit: int = 10):
-    try:
-        tracks = search_deezer_tracks(q, limit)
-        albums = search_deezer_albums(q, limit)
-        return success_response(data={"tracks": tracks, "albums": albums})
-    except DeezerAPIError as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+async def live_search(response: Response, q: str, limit: int = 10):
+    results, errors = await gather_with_deadline(
+        {
+            "tracks": search_deezer_tracks(q, limit),
+            "albums": search_deezer_albums(q, limit),
+        },
+        timeout=DEEZER_SEARCH_DEADLINE,
+    )
+    for error in errors.values():
+        if not isinstance(error, (DeezerAPIError, asyncio.TimeoutError)):
+            raise error
+    if not results:
+        # An open circuit or exhausted quota keeps its 503 and Retry-After.
+        unavailable = [e for e in errors.values() if isinstance(e, DeezerUnavailable)]
+        if unavailable:
+            raise _upstream_error(max(unavailable, key=lambda e: e.retry_after))
+        detail = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        raise _upstream_error(DeezerAPIError(detail))
+    if errors:
+        # A partial result must not be served from shared caches for the
+        # whole chart max-age.
+        response.headers["Cache-Control"] = "no-store"
+
+    return success_response(
+        data={
+            "tracks": results.get("tracks", []),
+            "albums": results.get("albums", []),
+            "degraded": sorted(errors),
+        }
+    )
 
 
 @router.get("/deezer/genres")
-def get_genres():
+async def get_genres():
     return success_response(data=list(GENRES.keys()))
 
 
+@router.get("/deezer/cache/stats")
+async def cache_stats():
+    return success_response(data=deezer_cache.stats())
+
+
+@router.get("/deezer/upstream/stats")
+async def upstream_health():
+    return success_response(data=upstream_stats())
+
+
 @router.get("/deezer/genre/{genre_name}/albums")
-def genre_albums(genre_name: str, limit: int = 5):
+async def genre_albums(genre_name: str, limit: int = 5):
     try:
-        albums = get_genre_albums(genre_name, limit)
+        albums = await get_genre_albums(genre_name, limit)
         return success_response(data=albums)
     except DeezerAPIError as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        raise _upstream_error(e)
 
 
 @router.get("/deezer/custom-albums")
-def custom_albums(genre: Optional[str] = Query(None), limit: int = 5):
+async def custom_albums(genre: Optional[str] = Query(None), limit: int = 5):
     try:
-        albums = get_genre_albums(genre, limit)
+        albums = await get_genre_albums(genre, limit)
         return success_response(data=albums)
     except DeezerAPIError as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        raise _upstream_error(e)
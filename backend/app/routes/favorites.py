@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.models.favorite import Favorite as FavoriteModel
-from app.schemas.favorite import Favorite, FavoriteCreate
-from app.auth.auth import get_current_user
-from app.schemas.user import User
+from app.models.track_metadata import TrackMetadata
+from app.schemas.favorite import Favorite, FavoriteCreate, FavoriteSync, FavoriteSyncResult
+from app.auth.auth import Principal, get_current_user
+from app.utils.fast_json import json_response, rows_to_dicts, schema_columns
 from app.utils.responses import success_response
+from app.utils.track_metadata import insert_track_metadata
+from app.utils.upsert import dialect_insert
 
 router = APIRouter()
 
@@ -27,59 +31,106 @@ def debug_favorites_auth(authorization: Optional[str] = Header(None)):
     }
 
 @router.get("/favorites", response_model=List[Favorite])
-def get_favorites(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+async def get_favorites(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    favorites = (
-        db.query(FavoriteModel).filter(FavoriteModel.user_id == current_user.id).all()
+    result = await db.execute(
+        select(*schema_columns(Favorite, FavoriteModel, TrackMetadata))
+        .join(TrackMetadata, TrackMetadata.track_id == FavoriteModel.track_id)
+        .where(FavoriteModel.user_id == current_user.id)
     )
-    return favorites
+    return json_response(rows_to_dicts(result.all(), Favorite))
 
 
 @router.post("/favorites", response_model=Favorite, status_code=status.HTTP_201_CREATED)
-def add_favorite(
+async def add_favorite(
     favorite: FavoriteCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    existing_favorite = (
-        db.query(FavoriteModel)
-        .filter(
-            FavoriteModel.user_id == current_user.id,
-            FavoriteModel.track_id == favorite.track_id,
-        )
-        .first()
+    await insert_track_metadata(db, [favorite.dict()])
+    statement = (
+        dialect_insert(db, FavoriteModel)
+        .values(user_id=current_user.id, track_id=favorite.track_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "track_id"])
+        .returning(FavoriteModel.id)
     )
+    favorite_id = (await db.execute(statement)).scalar_one_or_none()
+    if favorite_id is None:
+        result = await db.execute(
+            select(FavoriteModel.id).where(
+                FavoriteModel.user_id == current_user.id,
+                FavoriteModel.track_id == favorite.track_id,
+            )
+        )
+        favorite_id = result.scalar_one()
+    await db.commit()
+    return {**favorite.dict(), "id": favorite_id, "user_id": current_user.id}
 
-    if existing_favorite:
-        return existing_favorite
 
-    db_favorite = FavoriteModel(**favorite.dict(), user_id=current_user.id)
-    db.add(db_favorite)
-    db.commit()
-    db.refresh(db_favorite)
-    return db_favorite
+@router.post("/favorites/sync", response_model=FavoriteSyncResult)
+async def sync_favorites(
+    changes: FavoriteSync,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    additions = {favorite.track_id: favorite for favorite in changes.add}
+    removals = set(changes.remove)
+    conflicting = additions.keys() & removals
+    if conflicting:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Tracks both added and removed: {', '.join(sorted(conflicting))}",
+        )
+
+    added: List[str] = []
+    removed: List[str] = []
+    if additions:
+        await insert_track_metadata(db, (favorite.dict() for favorite in additions.values()))
+        statement = (
+            dialect_insert(db, FavoriteModel)
+            .values(
+                [
+                    {"user_id": current_user.id, "track_id": track_id}
+                    for track_id in additions
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "track_id"])
+            .returning(FavoriteModel.track_id)
+        )
+        added = (await db.execute(statement)).scalars().all()
+    if removals:
+        statement = (
+            delete(FavoriteModel)
+            .where(
+                FavoriteModel.user_id == current_user.id,
+                FavoriteModel.track_id.in_(removals),
+            )
+            .returning(FavoriteModel.track_id)
+        )
+        removed = (await db.execute(statement)).scalars().all()
+    await db.commit()
+    return {"added": sorted(added), "removed": sorted(removed)}
 
 
 @router.delete("/favorites/{track_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_favorite(
+async def remove_favorite(
     track_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    favorite = (
-        db.query(FavoriteModel)
-        .filter(
+    result = await db.execute(
+        delete(FavoriteModel)
+        .where(
             FavoriteModel.user_id == current_user.id, FavoriteModel.track_id == track_id
         )
-        .first()
+        .returning(FavoriteModel.id)
     )
-
-    if favorite is None:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Favorite not found"
         )
 
-    db.delete(favorite)
-    db.commit()
+    await db.commit()
     return None
@@ -1,49 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.models.history import History as HistoryModel
-from app.schemas.history import History, HistoryCreate
-from app.auth.auth import get_current_user
-from app.schemas.user import User
+from app.models.track_metadata import TrackMetadata
+from app.schemas.history import (
+    History,
+    HistoryAccepted,
+    HistoryBatch,
+    HistoryBatchResult,
+    HistoryCreate,
+    HistoryEvent,
+)
+from app.schemas.pagination import Page
+from app.utils.fast_json import page_response, schema_columns
+from app.utils.pagination import decode_cursor, page_size
+from app.utils.history_partitions import retention_cutoff
+from app.utils.history_writer import (
+    HistoryBackpressure,
+    HistoryBatchTooLarge,
+    history_writer,
+    insert_history_rows,
+)
+from app.auth.auth import Principal, get_current_user
 
 router = APIRouter()
 
 
-@router.get("/history", response_model=List[History])
-def get_history(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+def _history_row(item: HistoryEvent, user_id: int, now: datetime) -> Dict[str, Any]:
+    row = item.dict(exclude={"played_at"})
+    played_at = item.played_at or now
+    if played_at.tzinfo is not None:
+        played_at = played_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return {**row, "user_id": user_id, "played_at": min(played_at, now)}
+
+
+async def _enqueue_history(rows: List[Dict[str, Any]]) -> None:
+    try:
+        await history_writer.enqueue(rows)
+    except HistoryBackpressure as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except HistoryBatchTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+
+
+@router.get("/history", response_model=Page[History])
+async def get_history(
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    history = (
-        db.query(HistoryModel)
-        .filter(HistoryModel.user_id == current_user.id)
-        .order_by(HistoryModel.played_at.desc())
-        .limit(50)
-        .all()
+    query = (
+        select(*schema_columns(History, HistoryModel, TrackMetadata))
+        .join(TrackMetadata, TrackMetadata.track_id == HistoryModel.track_id)
+        .where(HistoryModel.user_id == current_user.id)
+    )
+    # Plain range predicates on played_at let Postgres prune history
+    # partitions; the row comparison alone is not used for pruning.
+    cutoff = retention_cutoff()
+    if cutoff is not None:
+        query = query.where(HistoryModel.played_at >= cutoff)
+    if cursor is not None:
+        played_at, last_id = decode_cursor(cursor, (datetime, int))
+        query = query.where(
+            HistoryModel.played_at <= played_at,
+            tuple_(HistoryModel.played_at, HistoryModel.id) < (played_at, last_id),
+        )
+    result = await db.execute(
+        query.order_by(HistoryModel.played_at.desc(), HistoryModel.id.desc()).limit(
+            limit + 1
+        )
+    )
+    return page_response(
+        result.all(), History, limit, lambda row: (row.played_at, row.id)
     )
-    return history
 
 
-@router.post("/history", response_model=History, status_code=status.HTTP_201_CREATED)
-def add_history(
+@router.post(
+    "/history",
+    response_model=History,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": HistoryAccepted,
+            "description": "Queued by the write-behind buffer; the play has no id yet.",
+        }
+    },
+)
+async def add_history(
     history_item: HistoryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    row = _history_row(HistoryEvent(**history_item.dict()), current_user.id, datetime.utcnow())
+    if history_writer.running:
+        await _enqueue_history([row])
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(HistoryAccepted(**row)),
+        )
+
+    (history_id,) = await insert_history_rows(db, [row])
+    await db.commit()
+    return {**row, "id": history_id}
+
+
+@router.post(
+    "/history/batch",
+    response_model=HistoryBatchResult,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def add_history_batch(
+    batch: HistoryBatch,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_history = HistoryModel(**history_item.dict(), user_id=current_user.id, played_at=datetime.utcnow())
-    db.add(db_history)
-    db.commit()
-    db.refresh(db_history)
-    return db_history
+    now = datetime.utcnow()
+    rows = [_history_row(item, current_user.id, now) for item in batch.items]
+    if history_writer.running:
+        await _enqueue_history(rows)
+    else:
+        await insert_history_rows(db, rows)
+        await db.commit()
+        response.status_code = status.HTTP_201_CREATED
+    return {"accepted": len(rows)}
 
 
 @router.delete("/history", status_code=status.HTTP_204_NO_CONTENT)
-def clear_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def clear_history(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db.query(HistoryModel).filter(HistoryModel.user_id == current_user.id).delete()
-    db.commit()
+    await db.execute(delete(HistoryModel).where(HistoryModel.user_id == current_user.id))
+    await db.commit()
     return None
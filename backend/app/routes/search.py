@@ -1,44 +1,44 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
-from app.models.track import Track
+from app.database.database import get_async_db
 from app.models.album import Album
+from app.models.track import Track
 from app.schemas.track import Track as TrackSchema
 from app.schemas.album import Album as AlbumSchema
+from app.utils.fast_json import json_response, rows_to_dicts, schema_columns
 from app.utils.responses import success_response
+from app.utils.catalog_index import catalog_index
+from app.utils.search_index import search_albums, search_tracks
 
 router = APIRouter()
 
 
 @router.get("/search")
-def search(
-    q: str = Query(..., description="Search query"), db: Session = Depends(get_db)
+async def search(
+    q: str = Query(..., description="Search query"),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    tracks = (
-        db.query(Track)
-        .filter(
-            or_(
-                Track.title.ilike(f"%{q}%"),
-                Track.artist.ilike(f"%{q}%"),
-                Track.genre.ilike(f"%{q}%"),
-            )
-        )
-        .limit(10)
-        .all()
+    tracks = await search_tracks(
+        db, q, limit, offset, columns=schema_columns(TrackSchema, Track)
     )
-
-    albums = (
-        db.query(Album)
-        .filter(or_(Album.title.ilike(f"%{q}%"), Album.artist.ilike(f"%{q}%")))
-        .limit(10)
-        .all()
+    albums = await search_albums(
+        db, q, limit, offset, columns=schema_columns(AlbumSchema, Album)
     )
 
     result = {
-        "tracks": [TrackSchema.from_orm(track) for track in tracks],
-        "albums": [AlbumSchema.from_orm(album) for album in albums],
+        "tracks": rows_to_dicts(tracks, TrackSchema),
+        "albums": rows_to_dicts(albums, AlbumSchema),
     }
 
-    return success_response(data=result, message="Search results")
+    return json_response(success_response(data=result, message="Search results"))
+
+
+@router.get("/search/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, description="Search prefix"),
+    limit: int = Query(8, ge=1, le=20),
+):
+    return success_response(data=catalog_index.search(q, limit), message="Suggestions")
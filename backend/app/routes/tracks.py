@@ -1,17 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 
 from app.database.database import get_db
+from app.utils.pagination import decode_cursor, page_size
 from app.models.track import Track as TrackModel
 from app.schemas.track import Track, TrackCreate
+from app.schemas.pagination import Page
+from app.utils.catalog_index import KIND_TRACK, catalog_index
+from app.utils.fast_json import page_response, schema_columns
 
 router = APIRouter()
 
-@router.get("/tracks", response_model=List[Track])
-def get_tracks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    tracks = db.query(TrackModel).offset(skip).limit(limit).all()
-    return tracks
+@router.get("/tracks", response_model=Page[Track])
+def get_tracks(
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    db: Session = Depends(get_db),
+):
+    query = select(*schema_columns(Track, TrackModel))
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, (int,))
+        query = query.where(TrackModel.id > last_id)
+    rows = db.execute(query.order_by(TrackModel.id).limit(limit + 1)).all()
+    return page_response(rows, Track, limit, lambda row: (row.id,))
 
 @router.get("/tracks/{track_id}", response_model=Track)
 def get_track(track_id: int, db: Session = Depends(get_db)):
@@ -26,6 +39,7 @@ def create_track(track: TrackCreate, db: Session = Depends(get_db)):
     db.add(db_track)
     db.commit()
     db.refresh(db_track)
+    catalog_index.add(KIND_TRACK, db_track.id, db_track.title, db_track.artist, db_track.genre)
     return db_track
 
 @router.delete("/tracks/{track_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -35,4 +49,5 @@ def delete_track(track_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Track not found")
     db.delete(track)
     db.commit()
+    catalog_index.remove(KIND_TRACK, track_id)
     return None
\ No newline at end of file
@@ -1,11 +1,16 @@
+import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 import hashlib
 
+from app.auth.auth import resolve_principal
 from app.database.database import get_db
+from app.utils.pagination import build_page, decode_cursor, page_size
 from app.models.user import User as UserModel
-from app.schemas.user import User, UserCreate, UserLogin
+from app.schemas.user import User, UserCreate, UserLogin, TokenRefresh
+from app.schemas.pagination import Page
+from app.utils.auth import REFRESH_TOKEN_TYPE, create_token_pair, decode_token
 
 router = APIRouter()
 
@@ -33,10 +38,18 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 
-@router.get("/users", response_model=List[User])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(UserModel).offset(skip).limit(limit).all()
-    return users
+@router.get("/users", response_model=Page[User])
+def get_users(
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    db: Session = Depends(get_db),
+):
+    query = db.query(UserModel)
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, (int,))
+        query = query.filter(UserModel.id > last_id)
+    users = query.order_by(UserModel.id).limit(limit + 1).all()
+    return build_page(users, limit, lambda user: (user.id,))
 
 
 @router.get("/users/{user_id}", response_model=User)
@@ -64,4 +77,25 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return {"access_token": user.username, "token_type": "bearer"}
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+    return create_token_pair(user.id, user.username, user.is_active)
+
+
+@router.post("/token/refresh")
+async def refresh_token(token_data: TokenRefresh):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(token_data.refresh_token, REFRESH_TOKEN_TYPE)
+        user_id = int(payload["sub"])
+    except (jwt.PyJWTError, KeyError, ValueError):
+        raise credentials_exception
+
+    principal = await resolve_principal(user_id)
+    if principal is None or not principal.is_active:
+        raise credentials_exception
+    return create_token_pair(principal.id, principal.username, principal.is_active)
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+DEEZER_BATCH_LIMIT = 300
+
+
+class DeezerBatch(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=DEEZER_BATCH_LIMIT)
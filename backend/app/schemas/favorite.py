@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
+
+FAVORITE_SYNC_LIMIT = 500
 
 
 class FavoriteBase(BaseModel):
@@ -20,3 +23,13 @@ class Favorite(FavoriteBase):
 
     class Config:
         orm_mode = True
+
+
+class FavoriteSync(BaseModel):
+    add: List[FavoriteCreate] = Field(default_factory=list, max_length=FAVORITE_SYNC_LIMIT)
+    remove: List[str] = Field(default_factory=list, max_length=FAVORITE_SYNC_LIMIT)
+
+
+class FavoriteSyncResult(BaseModel):
+    added: List[str]
+    removed: List[str]
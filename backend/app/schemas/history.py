@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+HISTORY_BATCH_LIMIT = 500
 
 
 class HistoryBase(BaseModel):
@@ -16,6 +18,24 @@ class HistoryCreate(HistoryBase):
     pass
 
 
+class HistoryEvent(HistoryBase):
+    played_at: Optional[datetime] = None
+
+
+class HistoryBatch(BaseModel):
+    items: List[HistoryEvent] = Field(..., min_length=1, max_length=HISTORY_BATCH_LIMIT)
+
+
+class HistoryBatchResult(BaseModel):
+    accepted: int
+
+
+class HistoryAccepted(HistoryBase):
+    # Write-behind answer: the row is buffered, so it has no id yet.
+    user_id: int
+    played_at: datetime
+
+
 class History(HistoryBase):
     id: int
     user_id: int
@@ -19,4 +19,7 @@ class User(UserBase):
 
 class UserLogin(BaseModel):
     username: str
-    password: str
\ No newline at end of file
+    password: str
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
\ No newline at end of file
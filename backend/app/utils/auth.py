@@ -3,19 +3,16 @@ from dotenv import load_dotenv
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database.database import get_db
-from app.models.user import User
 
 load_dotenv()
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "playpod_development_secret_key")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 14))
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login")
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
 
 def create_access_token(
@@ -25,29 +22,35 @@ def create_access_token(
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": ACCESS_TOKEN_TYPE})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+def create_refresh_token(
+    data: Dict[str, Any], expires_delta: Optional[timedelta] = None
+) -> str:
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (
+        expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     )
+    to_encode.update({"exp": expire, "type": REFRESH_TOKEN_TYPE})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
-        raise credentials_exception
-
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
 
-    return user
+def decode_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> Dict[str, Any]:
+    payload = jwt.decode(
+        token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]}
+    )
+    if payload.get("type") != token_type:
+        raise jwt.InvalidTokenError(f"Expected a {token_type} token")
+    return payload
+
+
+def create_token_pair(user_id: int, username: str, is_active: bool) -> Dict[str, Any]:
+    claims = {"sub": str(user_id), "username": username, "active": is_active}
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token({"sub": str(user_id)}),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
@@ -0,0 +1,325 @@
+import asyncio
+import os
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from dotenv import load_dotenv
+
+load_dotenv()
+CACHE_URL = os.environ.get("CACHE_URL", "memory://")
+CACHE_PREFIX = os.environ.get("CACHE_PREFIX", "playpod")
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 4096))
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_VERSION_REFRESH = float(os.environ.get("CACHE_VERSION_REFRESH", 5))
+
+_HEADER = struct.Struct("!d")
+_MISSING = object()
+
+
+class CacheBackend:
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    # Counters made by incr() are kept outside the LRU. They hold namespace
+    # versions, and evicting one would reset it to 0 and bring back entries
+    # cached before the last invalidation.
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._bytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        counter = self._counters.get(key)
+        if counter is not None:
+            return str(counter).encode()
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self._counters.pop(key, None)
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._counters.pop(key, None)
+        if key in self._entries:
+            self._remove(key)
+
+    async def incr(self, key: str) -> int:
+        current = await self.get(key)
+        if key in self._entries:
+            self._remove(key)
+        value = self._counters[key] = int(current or 0) + 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+class RedisBackend(CacheBackend):
+    def __init__(self, url: str, client: Any = None):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url)
+        self._client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        px = max(1, int(ttl * 1000)) if ttl is not None else None
+        await self._client.set(key, value, px=px)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+def create_cache_backend(url: str = CACHE_URL) -> CacheBackend:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url.startswith("memory://"):
+        return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_cache_backend()
+    return _backend
+
+
+async def close_cache_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+class CacheNamespace:
+    # Keys are "<prefix>:<name>:v<version>:<key>". Bumping the shared version
+    # counter orphans every key of the namespace at once; the backend TTLs
+    # reclaim them.
+    def __init__(
+        self,
+        name: str,
+        backend: Optional[CacheBackend] = None,
+        version_refresh: float = CACHE_VERSION_REFRESH,
+    ):
+        self.name = name
+        self._backend = backend
+        self._version_refresh = version_refresh
+        self._version: Optional[int] = None
+        self._version_checked = 0.0
+
+    @property
+    def backend(self) -> CacheBackend:
+        # MemoryBackend defines __len__, so an empty one is falsy.
+        return self._backend if self._backend is not None else get_cache_backend()
+
+    @property
+    def _version_key(self) -> str:
+        return f"{CACHE_PREFIX}:{self.name}:version"
+
+    async def _current_version(self) -> int:
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > self._version_refresh:
+            raw = await self.backend.get(self._version_key)
+            self._version = int(raw or 0)
+            self._version_checked = now
+        return self._version
+
+    async def key(self, key: str) -> str:
+        version = await self._current_version()
+        return f"{CACHE_PREFIX}:{self.name}:v{version}:{key}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.backend.get(await self.key(key))
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.backend.set(await self.key(key), value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(await self.key(key))
+
+    async def invalidate_all(self) -> None:
+        self._version = await self.backend.incr(self._version_key)
+        self._version_checked = time.monotonic()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refresh_errors: int = 0
+    backend_errors: int = 0
+    stale_if_error: int = 0
+
+
+class ResponseCache:
+    # Values are fresh for `ttl`, then served stale while a background
+    # refresh runs for `stale_ttl`. For `stale_if_error` after that they are
+    # only served when a synchronous refetch fails.
+    def __init__(
+        self, namespace: CacheNamespace, stale_ttl: float = 0, stale_if_error: float = 0
+    ):
+        self.namespace = namespace
+        self.stale_ttl = stale_ttl
+        self.stale_if_error = stale_if_error
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = CacheStats()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats.hits + self._stats.stale_hits + self._stats.misses
+        return {
+            **asdict(self._stats),
+            "namespace": self.namespace.name,
+            "hit_ratio": (
+                (self._stats.hits + self._stats.stale_hits) / lookups
+                if lookups
+                else 0.0
+            ),
+            **self.namespace.backend.stats(),
+        }
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float
+    ) -> Any:
+        try:
+            raw = await self.namespace.get(key)
+        except Exception:
+            # A cache outage must degrade to upstream calls, not errors.
+            self._stats.backend_errors += 1
+            raw = None
+        fallback = _MISSING
+        if raw is not None:
+            (fresh_until,) = _HEADER.unpack_from(raw)
+            value = orjson.loads(raw[_HEADER.size :])
+            now = time.time()
+            if now < fresh_until:
+                self._stats.hits += 1
+                return value
+            if now < fresh_until + self.stale_ttl:
+                self._stats.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch, ttl).add_done_callback(
+                        self._consume_refresh_error
+                    )
+                return value
+            fallback = value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats.coalesced += 1
+        else:
+            self._stats.misses += 1
+            task = self._start_fetch(key, fetch, ttl)
+        try:
+            # Shielded so a cancelled caller does not abort the fetch other
+            # callers are waiting on.
+            return await asyncio.shield(task)
+        except Exception:
+            if fallback is _MISSING:
+                raise
+            self._stats.stale_if_error += 1
+            return fallback
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        payload = _HEADER.pack(time.time() + ttl) + orjson.dumps(value)
+        await self.namespace.set(
+            key, payload, ttl + self.stale_ttl + self.stale_if_error
+        )
+
+    async def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            await self.namespace.invalidate_all()
+        else:
+            await self.namespace.delete(key)
+
+    def _start_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float
+    ) -> asyncio.Task:
+        async def run() -> Any:
+            try:
+                value = await fetch()
+                try:
+                    await self.set(key, value, ttl)
+                except Exception:
+                    self._stats.backend_errors += 1
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        return task
+
+    def _consume_refresh_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self._stats.refresh_errors += 1
@@ -0,0 +1,438 @@
+import bisect
+import heapq
+import math
+import sys
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.database.database import SessionLocal
+from app.models.album import Album
+from app.models.track import Track
+from app.utils.search_index import tokenize
+
+KIND_TRACK = "track"
+KIND_ALBUM = "album"
+KIND_DEEZER_TRACK = "deezer_track"
+
+MAX_PREFIX_CANDIDATES = 256
+MAX_PREFIX_EXPANSIONS = 32
+MAX_FUZZY_EXPANSIONS = 16
+# Autocomplete only needs the best few hits, so very common terms are
+# scanned up to this many postings instead of in full. Bulk-loaded posting
+# lists are ordered shortest document first, which is also BM25 order for a
+# single term, so the cut-off drops the lowest-scoring postings.
+MAX_POSTINGS_SCAN = 5000
+RESULT_CACHE_SIZE = 4096
+
+PREFIX_WEIGHT = 0.9
+FUZZY_WEIGHT = 0.7
+
+
+def _trigrams(term: str) -> List[str]:
+    padded = f"${term}$"
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def _within_distance(a: str, b: str, max_distance: int) -> bool:
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+class CatalogIndex:
+    # Documents are dense integer ids into parallel arrays; terms are interned
+    # and map to array-backed posting lists (doc ids + term frequencies).
+    # Prefix lookups bisect a sorted term list rather than walking a pointer
+    # trie, which keeps the per-term overhead to a single list slot.
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        # Set while a compaction is running; add/remove calls made meanwhile
+        # are recorded here and replayed onto the compacted index.
+        self._journal: Optional[List[Tuple[bool, tuple]]] = None
+        self._compaction: Optional[threading.Thread] = None
+        self._generation = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._kinds: List[str] = []
+        self._entity_ids = array("q")
+        self._titles: List[str] = []
+        self._artists: List[str] = []
+        self._lengths = array("H")
+        self._signatures = array("q")
+        self._live = bytearray()
+        self._doc_by_key: Dict[Tuple[str, int], int] = {}
+        self._term_ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._sorted_terms: List[str] = []
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._trigrams: Dict[str, array] = {}
+        self._live_count = 0
+        self._total_length = 0
+        self._max_length = 0
+        self._dead_count = 0
+        self._results: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": self._live_count,
+                "tombstones": self._dead_count,
+                "terms": len(self._terms),
+                "postings": sum(len(p) for p in self._postings),
+            }
+
+    def load(self, documents: Iterable[Tuple[str, int, str, str, Tuple[str, ...]]]) -> None:
+        with self._lock:
+            self._generation += 1
+            self._reset()
+            for kind, entity_id, title, artist, extra in documents:
+                self._add(kind, entity_id, title, artist, extra, keep_sorted=False)
+            self._sorted_terms = sorted(self._terms)
+            lengths = self._lengths
+            for term_id, postings in enumerate(self._postings):
+                if len(postings) < 2:
+                    continue
+                frequencies = self._frequencies[term_id]
+                order = sorted(range(len(postings)), key=lambda i: lengths[postings[i]])
+                self._postings[term_id] = array("I", (postings[i] for i in order))
+                self._frequencies[term_id] = array("H", (frequencies[i] for i in order))
+
+    def add(
+        self, kind: str, entity_id: int, title: str, artist: str, *extra: str
+    ) -> None:
+        with self._lock:
+            self._add(kind, entity_id, title, artist, extra, keep_sorted=True)
+            if self._journal is not None:
+                self._journal.append((True, (kind, entity_id, title, artist, extra)))
+            self._maybe_compact()
+
+    def remove(self, kind: str, entity_id: int) -> None:
+        with self._lock:
+            self._remove(kind, entity_id)
+            if self._journal is not None:
+                self._journal.append((False, (kind, entity_id)))
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        # Writers and async searches share the lock, so the O(N) rebuild
+        # runs on its own thread and the lock is only held to snapshot and
+        # to swap.
+        if self._dead_count <= max(1000, self._live_count // 4):
+            return
+        if self._compaction is None or not self._compaction.is_alive():
+            self._compaction = threading.Thread(
+                target=self.compact, name="catalog-compaction", daemon=True
+            )
+            self._compaction.start()
+
+    def _term_id(self, term: str, keep_sorted: bool) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is not None:
+            return term_id
+        term = sys.intern(term)
+        term_id = len(self._terms)
+        self._term_ids[term] = term_id
+        self._terms.append(term)
+        self._postings.append(array("I"))
+        self._frequencies.append(array("H"))
+        for gram in _trigrams(term):
+            self._trigrams.setdefault(gram, array("I")).append(term_id)
+        if keep_sorted:
+            bisect.insort(self._sorted_terms, term)
+        return term_id
+
+    def _add(
+        self,
+        kind: str,
+        entity_id: int,
+        title: Optional[str],
+        artist: Optional[str],
+        extra: Tuple[str, ...],
+        keep_sorted: bool,
+    ) -> None:
+        title = title or ""
+        artist = sys.intern(artist or "")
+        signature = hash((title, artist, extra))
+        existing = self._doc_by_key.get((kind, entity_id))
+        if existing is not None:
+            # Chart refreshes re-add the same tracks over and over; only a
+            # changed document is worth a tombstone.
+            if self._signatures[existing] == signature:
+                return
+            self._remove(kind, entity_id)
+        self._results.clear()
+
+        tokens = tokenize(" ".join((title, artist, *(e or "" for e in extra))))
+        doc = len(self._entity_ids)
+        self._kinds.append(sys.intern(kind))
+        self._entity_ids.append(entity_id)
+        self._titles.append(title)
+        self._artists.append(artist)
+        self._lengths.append(min(len(tokens), 0xFFFF))
+        self._signatures.append(signature)
+        self._max_length = max(self._max_length, self._lengths[doc])
+        self._live.append(1)
+        self._doc_by_key[(kind, entity_id)] = doc
+        self._live_count += 1
+        self._total_length += self._lengths[doc]
+
+        for term, frequency in Counter(tokens).items():
+            term_id = self._term_id(term, keep_sorted)
+            self._postings[term_id].append(doc)
+            self._frequencies[term_id].append(min(frequency, 0xFFFF))
+
+    def _remove(self, kind: str, entity_id: int) -> None:
+        doc = self._doc_by_key.pop((kind, entity_id), None)
+        if doc is None:
+            return
+        self._results.clear()
+        self._live[doc] = 0
+        self._titles[doc] = ""
+        self._artists[doc] = ""
+        self._live_count -= 1
+        self._total_length -= self._lengths[doc]
+        self._dead_count += 1
+
+    def compact(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                return
+            self._journal = []
+            generation = self._generation
+            # Documents only ever get new, higher ids, so everything below
+            # `docs` is stable and posting lists can be read without the lock
+            # as long as entries for later documents are skipped.
+            docs = len(self._entity_ids)
+            snapshot = (
+                bytes(self._live),
+                self._kinds[:docs],
+                self._entity_ids[:docs],
+                self._titles[:docs],
+                self._artists[:docs],
+                self._lengths[:docs],
+                self._signatures[:docs],
+                self._terms[:],
+                self._postings[:],
+                self._frequencies[:],
+            )
+        try:
+            state = self._compacted(*snapshot)
+        finally:
+            with self._lock:
+                journal, self._journal = self._journal, None
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.__dict__.update(state)
+            self._results.clear()
+            for is_add, args in journal:
+                if is_add:
+                    self._add(*args, keep_sorted=True)
+                else:
+                    self._remove(*args)
+
+    @staticmethod
+    def _compacted(
+        live, kinds, entity_ids, titles, artists, lengths, signatures, old_terms,
+        old_postings, old_frequencies,
+    ) -> Dict[str, Any]:
+        # Renumbers the live documents densely and drops terms left without
+        # postings, so tombstones give back their slots as well as postings.
+        docs = len(live)
+        new_ids = array("q", [-1]) * docs
+        kept_docs = [doc for doc in range(docs) if live[doc]]
+        for new_doc, doc in enumerate(kept_docs):
+            new_ids[doc] = new_doc
+
+        kinds = [kinds[doc] for doc in kept_docs]
+        entity_ids = array("q", (entity_ids[doc] for doc in kept_docs))
+        lengths = array("H", (lengths[doc] for doc in kept_docs))
+
+        terms, postings_by_term, frequencies_by_term = [], [], []
+        for term, postings, frequencies in zip(old_terms, old_postings, old_frequencies):
+            kept = [i for i, doc in enumerate(postings) if doc < docs and live[doc]]
+            if not kept:
+                continue
+            terms.append(term)
+            postings_by_term.append(array("I", (new_ids[postings[i]] for i in kept)))
+            frequencies_by_term.append(array("H", (frequencies[i] for i in kept)))
+        trigrams: Dict[str, array] = {}
+        for term_id, term in enumerate(terms):
+            for gram in _trigrams(term):
+                trigrams.setdefault(gram, array("I")).append(term_id)
+
+        return {
+            "_kinds": kinds,
+            "_entity_ids": entity_ids,
+            "_titles": [titles[doc] for doc in kept_docs],
+            "_artists": [artists[doc] for doc in kept_docs],
+            "_lengths": lengths,
+            "_signatures": array("q", (signatures[doc] for doc in kept_docs)),
+            "_live": bytearray(b"\x01") * len(kept_docs),
+            "_doc_by_key": {
+                (kinds[doc], entity_ids[doc]): doc for doc in range(len(kept_docs))
+            },
+            "_max_length": max(lengths, default=0),
+            "_live_count": len(kept_docs),
+            "_total_length": sum(lengths),
+            "_dead_count": 0,
+            "_terms": terms,
+            "_postings": postings_by_term,
+            "_frequencies": frequencies_by_term,
+            "_term_ids": {term: term_id for term_id, term in enumerate(terms)},
+            "_sorted_terms": sorted(terms),
+            "_trigrams": trigrams,
+        }
+
+    def _expand(self, token: str, prefix: bool) -> List[Tuple[int, float]]:
+        expansions: Dict[int, float] = {}
+        term_id = self._term_ids.get(token)
+        if term_id is not None:
+            expansions[term_id] = 1.0
+
+        if prefix:
+            start = bisect.bisect_left(self._sorted_terms, token)
+            candidates = []
+            for term in self._sorted_terms[start : start + MAX_PREFIX_CANDIDATES]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    candidates.append(self._term_ids[term])
+            candidates.sort(key=lambda t: len(self._postings[t]), reverse=True)
+            for candidate in candidates[:MAX_PREFIX_EXPANSIONS]:
+                expansions[candidate] = PREFIX_WEIGHT
+
+        if not expansions and len(token) >= 3:
+            grams = _trigrams(token)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+            needed = max(1, len(grams) // 2)
+            max_distance = 1 if len(token) <= 5 else 2
+            for candidate, count in shared.most_common():
+                if count < needed or len(expansions) >= MAX_FUZZY_EXPANSIONS:
+                    break
+                if _within_distance(token, self._terms[candidate], max_distance):
+                    expansions[candidate] = FUZZY_WEIGHT
+
+        return list(expansions.items())
+
+    def search(
+        self, query: str, limit: int = 10, kinds: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        wanted = frozenset(kinds) if kinds is not None else None
+        cache_key = (tuple(tokens), limit, wanted)
+
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return cached
+            results = self._search(tokens, limit, wanted)
+            self._results[cache_key] = results
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            return results
+
+    def _search(
+        self, tokens: List[str], limit: int, wanted: Optional[frozenset]
+    ) -> List[Dict[str, Any]]:
+        if not self._live_count:
+            return []
+        total_docs = self._live_count
+        average_length = self._total_length / total_docs or 1.0
+        live, lengths = self._live, self._lengths
+        k1, b = self.k1, self.b
+
+        norms = [
+            k1 * (1 - b + b * length / average_length)
+            for length in range(self._max_length + 1)
+        ]
+
+        scores: Optional[Dict[int, float]] = None
+        for position, token in enumerate(tokens):
+            token_scores: Dict[int, float] = {}
+            for term_id, weight in self._expand(
+                token, prefix=position == len(tokens) - 1
+            ):
+                postings = self._postings[term_id]
+                # Postings still include tombstones until the next compaction.
+                df = min(len(postings), total_docs)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                factor = weight * idf * (k1 + 1)
+                for doc, tf in islice(
+                    zip(postings, self._frequencies[term_id]), MAX_POSTINGS_SCAN
+                ):
+                    if not live[doc] or (scores is not None and doc not in scores):
+                        continue
+                    score = factor * tf / (tf + norms[lengths[doc]])
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc: scores[doc] + s for doc, s in token_scores.items()}
+            if not scores:
+                return []
+
+        if wanted is not None:
+            scores = {d: s for d, s in scores.items() if self._kinds[d] in wanted}
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [
+            {
+                "type": self._kinds[doc],
+                "id": self._entity_ids[doc],
+                "title": self._titles[doc],
+                "artist": self._artists[doc],
+                "score": round(score, 4),
+            }
+            for doc, score in top
+        ]
+
+
+catalog_index = CatalogIndex()
+
+
+def _catalog_documents(db):
+    tracks = db.query(Track.id, Track.title, Track.artist, Track.genre)
+    for row in tracks.yield_per(10000):
+        yield KIND_TRACK, row.id, row.title, row.artist, (row.genre,)
+    albums = db.query(Album.id, Album.title, Album.artist)
+    for row in albums.yield_per(10000):
+        yield KIND_ALBUM, row.id, row.title, row.artist, ()
+
+
+def load_catalog_index() -> None:
+    db = SessionLocal()
+    try:
+        catalog_index.load(_catalog_documents(db))
+    finally:
+        db.close()
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Tuple
+
+
+async def gather_with_deadline(
+    calls: Dict[str, Awaitable[Any]], timeout: float
+) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    if not tasks:
+        return {}, {}
+
+    pending = set(tasks.values())
+    try:
+        _, pending = await asyncio.wait(pending, timeout=timeout)
+    finally:
+        # Also runs when the caller itself is cancelled (a client
+        # disconnect), so no upstream call outlives its request and every
+        # task's exception is retrieved.
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    results: Dict[str, Any] = {}
+    errors: Dict[str, BaseException] = {}
+    for name, task in tasks.items():
+        if task in pending:
+            errors[name] = asyncio.TimeoutError(
+                f"{name} did not finish within {timeout}s"
+            )
+        elif task.exception() is not None:
+            errors[name] = task.exception()
+        else:
+            results[name] = task.result()
+    return results, errors
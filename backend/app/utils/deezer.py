@@ -1,13 +1,71 @@
+import asyncio
+import hashlib
 import os
 from dotenv import load_dotenv
-import requests
-from requests.exceptions import RequestException
-from typing import List, Dict, Any
+import httpx
+from typing import List, Dict, Any, Optional, Awaitable, Callable, Iterable, Tuple
 import random
+import time
 from collections import defaultdict
+from app.utils.cache import CacheNamespace, ResponseCache
+from app.utils.catalog_index import KIND_DEEZER_TRACK, catalog_index
+from app.utils.metrics import count_upstream_error, endpoint_template, observe_upstream
+from app.utils.profiling import record_upstream
+from app.utils.track_metadata import schedule_deezer_metadata_refresh
+from app.utils.resilience import (
+    BreakerRegistry,
+    CircuitOpenError,
+    RateLimitTimeout,
+    RetryBudget,
+    TokenBucket,
+    backoff_delay,
+)
 
 load_dotenv()
 DEEZER_BASE_URL = os.environ.get("DEEZER_BASE_URL", "https://api.deezer.com")
+DEEZER_TIMEOUT = float(os.environ.get("DEEZER_TIMEOUT", 5))
+DEEZER_CONNECT_TIMEOUT = float(os.environ.get("DEEZER_CONNECT_TIMEOUT", 2))
+DEEZER_MAX_CONNECTIONS = int(os.environ.get("DEEZER_MAX_CONNECTIONS", 50))
+DEEZER_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("DEEZER_MAX_KEEPALIVE_CONNECTIONS", 20)
+)
+DEEZER_KEEPALIVE_EXPIRY = float(os.environ.get("DEEZER_KEEPALIVE_EXPIRY", 30))
+DEEZER_SEARCH_DEADLINE = float(os.environ.get("DEEZER_SEARCH_DEADLINE", 3))
+DEEZER_BATCH_CONCURRENCY = int(os.environ.get("DEEZER_BATCH_CONCURRENCY", 10))
+
+DEEZER_MAX_RETRIES = int(os.environ.get("DEEZER_MAX_RETRIES", 2))
+DEEZER_RETRY_BASE_DELAY = float(os.environ.get("DEEZER_RETRY_BASE_DELAY", 0.1))
+DEEZER_RETRY_MAX_DELAY = float(os.environ.get("DEEZER_RETRY_MAX_DELAY", 1))
+DEEZER_RETRY_BUDGET_RATIO = float(os.environ.get("DEEZER_RETRY_BUDGET_RATIO", 0.1))
+DEEZER_RETRY_BUDGET_MIN_PER_SECOND = float(
+    os.environ.get("DEEZER_RETRY_BUDGET_MIN_PER_SECOND", 1)
+)
+DEEZER_BREAKER_FAILURE_THRESHOLD = int(
+    os.environ.get("DEEZER_BREAKER_FAILURE_THRESHOLD", 5)
+)
+DEEZER_BREAKER_RECOVERY_TIMEOUT = float(
+    os.environ.get("DEEZER_BREAKER_RECOVERY_TIMEOUT", 30)
+)
+# Deezer allows 50 requests per 5 seconds.
+DEEZER_RATE_LIMIT = float(os.environ.get("DEEZER_RATE_LIMIT", 10))
+DEEZER_RATE_LIMIT_BURST = float(os.environ.get("DEEZER_RATE_LIMIT_BURST", 50))
+DEEZER_RATE_LIMIT_MAX_WAIT = float(os.environ.get("DEEZER_RATE_LIMIT_MAX_WAIT", 2))
+
+GENRE_ALBUMS_REFRESH_INTERVAL = float(
+    os.environ.get("GENRE_ALBUMS_REFRESH_INTERVAL", 1800)
+)
+
+DEEZER_CACHE_STALE_TTL = float(os.environ.get("DEEZER_CACHE_STALE_TTL", 600))
+DEEZER_CACHE_STALE_IF_ERROR = float(os.environ.get("DEEZER_CACHE_STALE_IF_ERROR", 3600))
+DEEZER_CACHE_TTLS = {
+    name: float(os.environ.get(f"DEEZER_CACHE_TTL_{name.upper()}", default))
+    for name, default in {
+        "chart": 300,
+        "track": 900,
+        "album": 900,
+        "genre_albums": 1800,
+    }.items()
+}
 
 GENRES = {
     "pop": 132,
@@ -27,71 +85,290 @@ class DeezerAPIError(Exception):
     pass
 
 
-def get_deezer_chart_tracks(limit: int = 10):
-    try:
-        resp = requests.get(
-            f"{DEEZER_BASE_URL}/chart/0/tracks", params={"limit": limit}
+class DeezerUnavailable(DeezerAPIError):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeezerNotFound(DeezerAPIError):
+    pass
+
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Deezer answers most errors with HTTP 200 and an {"error": {...}} body.
+# 4 is "Quota limit exceeded" and 700 "Service busy"; 800 is "no data".
+_QUOTA_ERROR_CODES = {4, 700}
+_NOT_FOUND_ERROR_CODE = 800
+DEEZER_QUOTA_WINDOW = 5
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+deezer_cache = ResponseCache(
+    CacheNamespace("deezer"),
+    stale_ttl=DEEZER_CACHE_STALE_TTL,
+    stale_if_error=DEEZER_CACHE_STALE_IF_ERROR,
+)
+
+deezer_breakers = BreakerRegistry(
+    failure_threshold=DEEZER_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=DEEZER_BREAKER_RECOVERY_TIMEOUT,
+)
+deezer_retry_budget = RetryBudget(
+    ratio=DEEZER_RETRY_BUDGET_RATIO,
+    min_per_second=DEEZER_RETRY_BUDGET_MIN_PER_SECOND,
+)
+deezer_rate_limiter = TokenBucket(
+    DEEZER_RATE_LIMIT, DEEZER_RATE_LIMIT_BURST, max_wait=DEEZER_RATE_LIMIT_MAX_WAIT
+)
+
+_custom_albums_by_genre: Dict[str, List[Dict[str, Any]]] = {}
+_custom_albums_by_id: Dict[int, Dict[str, Any]] = {}
+
+
+def _build_client() -> httpx.AsyncClient:
+    # Every upstream request goes to the same host, so the pool-wide limits
+    # are effectively the per-host connection limits.
+    return httpx.AsyncClient(
+        base_url=DEEZER_BASE_URL,
+        timeout=httpx.Timeout(DEEZER_TIMEOUT, connect=DEEZER_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=DEEZER_MAX_CONNECTIONS,
+            max_keepalive_connections=DEEZER_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=DEEZER_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def close_deezer_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_deezer_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def _get(path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    endpoint = endpoint_template(path)
+    breaker = deezer_breakers.get(endpoint)
+    deezer_retry_budget.record_request()
+    attempt = 0
+    while True:
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            count_upstream_error("deezer", endpoint, "circuit_open")
+            raise DeezerUnavailable(str(e), e.retry_after) from e
+        try:
+            await deezer_rate_limiter.acquire()
+        except RateLimitTimeout as e:
+            breaker.record_cancelled()
+            count_upstream_error("deezer", endpoint, "rate_limited")
+            raise DeezerUnavailable(str(e), e.retry_after) from e
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+
+        started = time.perf_counter()
+        failure: Optional[Exception] = None
+        try:
+            resp = await get_deezer_client().get(path, params=params)
+            resp.raise_for_status()
+            data = resp.json()
+        except httpx.HTTPError as e:
+            record_upstream(started)
+            if isinstance(e, httpx.HTTPStatusError):
+                reason = str(e.response.status_code)
+                retryable = e.response.status_code in _RETRYABLE_STATUS
+            else:
+                reason = type(e).__name__
+                retryable = True
+            observe_upstream("deezer", endpoint, started, reason)
+            if not retryable:
+                # A 4xx answer still means Deezer is up.
+                breaker.record_success()
+                raise
+            failure = e
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except ValueError as e:
+            # A 200 that is not JSON is a proxy or maintenance page, not data.
+            record_upstream(started)
+            observe_upstream("deezer", endpoint, started, "invalid_json")
+            breaker.record_failure()
+            raise DeezerAPIError(f"Deezer returned an invalid response: {e}") from e
+        except Exception:
+            # Every call that passed before_call must settle the breaker, or
+            # a half-open trial slot stays taken and the circuit never closes.
+            record_upstream(started)
+            observe_upstream("deezer", endpoint, started, "unexpected")
+            breaker.record_failure()
+            raise
+        else:
+            record_upstream(started)
+            error = data.get("error") if isinstance(data, dict) else None
+            if not error:
+                observe_upstream("deezer", endpoint, started)
+                breaker.record_success()
+                return data
+            if not isinstance(error, dict):
+                error = {"message": str(error)}
+            code = error.get("code")
+            message = error.get("message") or f"Deezer error {code}"
+            observe_upstream("deezer", endpoint, started, f"error_{code}")
+            if code not in _QUOTA_ERROR_CODES:
+                breaker.record_success()
+                if code == _NOT_FOUND_ERROR_CODE:
+                    raise DeezerNotFound(message)
+                raise DeezerAPIError(message)
+            failure = DeezerUnavailable(message, DEEZER_QUOTA_WINDOW)
+
+        breaker.record_failure()
+        if attempt >= DEEZER_MAX_RETRIES or not deezer_retry_budget.try_retry():
+            raise failure
+        await asyncio.sleep(
+            backoff_delay(attempt, DEEZER_RETRY_BASE_DELAY, DEEZER_RETRY_MAX_DELAY)
         )
-        resp.raise_for_status()
-        data = resp.json().get("data", [])
-        return data
-    except RequestException as e:
+        attempt += 1
+
+
+def upstream_stats() -> Dict[str, Any]:
+    return {
+        "breakers": deezer_breakers.stats(),
+        "retry_budget": deezer_retry_budget.stats(),
+        "rate_limiter": deezer_rate_limiter.stats(),
+    }
+
+
+async def _fetch_chart_tracks(limit: int):
+    try:
+        data = await _get("/chart/0/tracks", params={"limit": limit})
+    except httpx.HTTPError as e:
         raise DeezerAPIError(str(e))
+    tracks = data.get("data", [])
+    for track in tracks:
+        catalog_index.add(
+            KIND_DEEZER_TRACK,
+            track["id"],
+            track.get("title"),
+            track.get("artist", {}).get("name"),
+            track.get("album", {}).get("title"),
+        )
+    return tracks
+
 
+async def get_deezer_chart_tracks(limit: int = 10):
+    return await deezer_cache.get_or_fetch(
+        f"chart:{limit}",
+        lambda: _fetch_chart_tracks(limit),
+        ttl=DEEZER_CACHE_TTLS["chart"],
+    )
 
-def get_deezer_track(track_id: int):
+
+async def _fetch_track(track_id: int):
     try:
-        resp = requests.get(f"{DEEZER_BASE_URL}/track/{track_id}")
-        resp.raise_for_status()
-        return resp.json()
-    except RequestException as e:
+        track = await _get(f"/track/{track_id}")
+    except httpx.HTTPError as e:
         raise DeezerAPIError(str(e))
+    # Deezer is the one trusted source for the shared metadata row that
+    # favorites and history join against.
+    schedule_deezer_metadata_refresh(track)
+    return track
+
+
+async def get_deezer_track(track_id: int):
+    return await deezer_cache.get_or_fetch(
+        f"track:{track_id}",
+        lambda: _fetch_track(track_id),
+        ttl=DEEZER_CACHE_TTLS["track"],
+    )
 
 
-def get_deezer_album(album_id: int):
+async def _fetch_album(album_id: int):
     try:
-        resp = requests.get(f"{DEEZER_BASE_URL}/album/{album_id}")
-        resp.raise_for_status()
-        return resp.json()
-    except RequestException as e:
+        return await _get(f"/album/{album_id}")
+    except httpx.HTTPError as e:
         raise DeezerAPIError(str(e))
 
 
-def search_deezer_tracks(query: str, limit: int = 10):
+async def get_deezer_album(album_id: int):
+    return await deezer_cache.get_or_fetch(
+        f"album:{album_id}",
+        lambda: _fetch_album(album_id),
+        ttl=DEEZER_CACHE_TTLS["album"],
+    )
+
+
+async def search_deezer_tracks(query: str, limit: int = 10):
     try:
-        resp = requests.get(
-            f"{DEEZER_BASE_URL}/search", params={"q": query, "limit": limit}
-        )
-        resp.raise_for_status()
-        return resp.json().get("data", [])
-    except RequestException as e:
+        data = await _get("/search", params={"q": query, "limit": limit})
+        return data.get("data", [])
+    except httpx.HTTPError as e:
         raise DeezerAPIError(str(e))
 
 
-def search_deezer_albums(query: str, limit: int = 10):
+async def search_deezer_albums(query: str, limit: int = 10):
     try:
-        resp = requests.get(
-            f"{DEEZER_BASE_URL}/search/album", params={"q": query, "limit": limit}
-        )
-        resp.raise_for_status()
-        return resp.json().get("data", [])
-    except RequestException as e:
+        data = await _get("/search/album", params={"q": query, "limit": limit})
+        return data.get("data", [])
+    except httpx.HTTPError as e:
         raise DeezerAPIError(str(e))
 
 
-def get_tracks_by_genre(genre_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+async def get_tracks_by_genre(genre_id: int, limit: int = 50) -> List[Dict[str, Any]]:
     try:
-        resp = requests.get(
-            f"{DEEZER_BASE_URL}/radio/{genre_id}/tracks", params={"limit": limit}
-        )
-        resp.raise_for_status()
-        return resp.json().get("data", [])
-    except RequestException as e:
+        data = await _get(f"/radio/{genre_id}/tracks", params={"limit": limit})
+        return data.get("data", [])
+    except httpx.HTTPError as e:
         raise DeezerAPIError(f"Failed to get genre tracks: {str(e)}")
 
 
+async def get_deezer_album_or_custom(album_id: int):
+    custom_album = get_custom_album(album_id)
+    if custom_album is not None:
+        return custom_album
+    return await get_deezer_album(album_id)
+
+
+async def fetch_batch(
+    ids: Iterable[int],
+    fetch: Callable[[int], Awaitable[Any]],
+    concurrency: int = DEEZER_BATCH_CONCURRENCY,
+) -> List[Tuple[int, Any]]:
+    # Duplicate ids are fetched once. Cached ids return straight from
+    # get_or_fetch, and the semaphore only bounds how many misses go
+    # upstream at once. A failed id comes back as its exception.
+    unique_ids = list(dict.fromkeys(ids))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(item_id: int) -> Any:
+        async with semaphore:
+            return await fetch(item_id)
+
+    results = await asyncio.gather(
+        *(fetch_one(item_id) for item_id in unique_ids), return_exceptions=True
+    )
+    return list(zip(unique_ids, results))
+
+
+def custom_album_id(prefix: str, *parts: Any) -> int:
+    # 11-digit ids keep custom albums clear of Deezer's own album id range.
+    digest = hashlib.blake2b(
+        ":".join(str(part) for part in parts).encode(), digest_size=8
+    ).digest()
+    return int(f"{prefix}{int.from_bytes(digest, 'big') % 10**10:010d}")
+
+
 def build_custom_albums(
-    tracks: List[Dict[str, Any]], tracks_per_album: int = 10
+    tracks: List[Dict[str, Any]], tracks_per_album: int = 10, seed: str = ""
 ) -> List[Dict[str, Any]]:
     if not tracks:
         return []
@@ -108,7 +385,7 @@ def build_custom_albums(
             template = artist_tracks[0].get("album", {})
 
             album = {
-                "id": int(f"9{random.randint(10000, 99999)}"),
+                "id": custom_album_id("9", seed, "artist", artist_name),
                 "title": f"Best of {artist_name}",
                 "artist": {"name": artist_name},
                 "cover": template.get("cover")
@@ -142,7 +419,7 @@ def build_custom_albums(
             for genre_name, genre_tracks in genres.items():
                 if len(genre_tracks) >= 5:
                     genre_album = {
-                        "id": int(f"8{random.randint(10000, 99999)}"),
+                        "id": custom_album_id("8", seed, "genre", genre_name),
                         "title": f"{genre_name.title() if isinstance(genre_name, str) else 'Misc'} Collection",
                         "artist": {"name": "Various Artists"},
                         "cover": genre_tracks[0].get("album", {}).get("cover"),
@@ -163,27 +440,79 @@ def build_custom_albums(
     return custom_albums
 
 
-def get_genre_albums(genre_name: str = None, limit: int = 5) -> List[Dict[str, Any]]:
-    try:
-        if not genre_name:
-            genre_name = random.choice(list(GENRES.keys()))
+async def refresh_genre_albums(genre_name: str) -> List[Dict[str, Any]]:
+    tracks = await get_tracks_by_genre(GENRES.get(genre_name, 0), 100)
+    albums = build_custom_albums(tracks, 10, seed=genre_name)
+    if genre_name not in GENRES:
+        return albums
 
-        genre_id = GENRES.get(genre_name.lower(), 0)
+    for album in _custom_albums_by_genre.get(genre_name, []):
+        _custom_albums_by_id.pop(album["id"], None)
+    _custom_albums_by_genre[genre_name] = albums
+    for album in albums:
+        _custom_albums_by_id[album["id"]] = album
+    return albums
 
-        albums = []
 
-        search_resp = requests.get(
-            f"{DEEZER_BASE_URL}/search/album", params={"q": genre_name, "limit": limit}
-        )
-        search_resp.raise_for_status()
-        search_albums = search_resp.json().get("data", [])
-        albums.extend(search_albums)
+async def refresh_all_genre_albums() -> None:
+    # A genre that fails to refresh keeps serving its previous albums.
+    await asyncio.gather(
+        *(refresh_genre_albums(genre_name) for genre_name in GENRES),
+        return_exceptions=True,
+    )
+
+
+async def run_genre_album_refresher(
+    interval: float = GENRE_ALBUMS_REFRESH_INTERVAL,
+) -> None:
+    while True:
+        await refresh_all_genre_albums()
+        await asyncio.sleep(interval)
 
-        if len(albums) < limit:
-            tracks = get_tracks_by_genre(genre_id, 100)
-            custom_albums = build_custom_albums(tracks, 10)
-            albums.extend(custom_albums[: limit - len(albums)])
 
-        return albums[:limit]
-    except RequestException as e:
+def get_custom_album(album_id: int) -> Optional[Dict[str, Any]]:
+    return _custom_albums_by_id.get(album_id)
+
+
+async def _get_custom_genre_albums(genre_name: str) -> List[Dict[str, Any]]:
+    albums = _custom_albums_by_genre.get(genre_name)
+    if albums is not None:
+        return albums
+    # Unknown genres are never kept by the refresher, and a cold known genre
+    # is not kept yet; the cache stores them and coalesces concurrent misses.
+    return await deezer_cache.get_or_fetch(
+        f"custom_albums:{genre_name}",
+        lambda: refresh_genre_albums(genre_name),
+        ttl=DEEZER_CACHE_TTLS["genre_albums"],
+    )
+
+
+async def _fetch_genre_search_albums(
+    genre_name: str, limit: int
+) -> List[Dict[str, Any]]:
+    try:
+        data = await _get("/search/album", params={"q": genre_name, "limit": limit})
+        return data.get("data", [])
+    except httpx.HTTPError as e:
         raise DeezerAPIError(f"Failed to get genre albums: {str(e)}")
+
+
+async def get_genre_albums(
+    genre_name: str = None, limit: int = 5
+) -> List[Dict[str, Any]]:
+    if not genre_name:
+        genre_name = random.choice(list(GENRES.keys()))
+    genre_name = genre_name.lower()
+
+    albums = list(
+        await deezer_cache.get_or_fetch(
+            f"genre_albums:{genre_name}:{limit}",
+            lambda: _fetch_genre_search_albums(genre_name, limit),
+            ttl=DEEZER_CACHE_TTLS["genre_albums"],
+        )
+    )
+    if len(albums) < limit:
+        custom_albums = await _get_custom_genre_albums(genre_name)
+        albums.extend(custom_albums[: limit - len(albums)])
+
+    return albums[:limit]
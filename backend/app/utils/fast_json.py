@@ -0,0 +1,43 @@
+from typing import Any, Callable, Dict, List, Sequence, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.utils.pagination import build_page
+
+# Read endpoints select exactly the columns of their response schema and
+# hand plain dicts to orjson, skipping ORM object construction and
+# per-row Pydantic validation. The routes keep their response_model for the
+# OpenAPI schema; returning a Response bypasses it at runtime.
+
+
+def schema_columns(schema: Type[BaseModel], *models) -> list:
+    columns = []
+    for name in schema.model_fields:
+        for model in models:
+            if name in model.__table__.c:
+                columns.append(getattr(model, name))
+                break
+        else:
+            raise ValueError(f"No column for {schema.__name__}.{name}")
+    return columns
+
+
+def rows_to_dicts(rows: Sequence[Any], schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    names = tuple(schema.model_fields)
+    return [dict(zip(names, row)) for row in rows]
+
+
+def json_response(content: Any, status_code: int = 200) -> ORJSONResponse:
+    return ORJSONResponse(content, status_code=status_code)
+
+
+def page_response(
+    rows: Sequence[Any],
+    schema: Type[BaseModel],
+    limit: int,
+    cursor_key: Callable[[Any], Sequence[Any]],
+) -> ORJSONResponse:
+    page = build_page(rows, limit, cursor_key)
+    page["items"] = rows_to_dicts(page["items"], schema)
+    return json_response(page)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.database.database import engine
+
+load_dotenv()
+HISTORY_RETENTION_MONTHS = int(os.environ.get("HISTORY_RETENTION_MONTHS", 0))
+HISTORY_PARTITIONS_AHEAD = int(os.environ.get("HISTORY_PARTITIONS_AHEAD", 3))
+HISTORY_PARTITION_MAINTENANCE_INTERVAL = float(
+    os.environ.get("HISTORY_PARTITION_MAINTENANCE_INTERVAL", 6 * 3600)
+)
+
+_PARTITION_RE = re.compile(r"^history_y(\d{4})m(\d{2})$")
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(moment: datetime, offset: int = 0) -> datetime:
+    months = moment.year * 12 + moment.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"history_y{month.year:04d}m{month.month:02d}"
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> Optional[datetime]:
+    if HISTORY_RETENTION_MONTHS <= 0:
+        return None
+    return month_start(now or datetime.utcnow(), -HISTORY_RETENTION_MONTHS)
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = 'history' AND pg_table_is_visible(c.oid)"
+            )
+        ).first()
+    )
+
+
+def _partitions(connection: Connection) -> List[str]:
+    rows = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'history'::regclass"
+        )
+    )
+    return [row.relname for row in rows]
+
+
+def ensure_history_partitions(
+    connection: Connection, now: Optional[datetime] = None
+) -> List[str]:
+    now = now or datetime.utcnow()
+    existing = set(_partitions(connection))
+    created = []
+    for offset in range(HISTORY_PARTITIONS_AHEAD + 1):
+        month = month_start(now, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        connection.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF history "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{month_start(month, 1).isoformat()}')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+def drop_expired_history_partitions(
+    connection: Connection, now: Optional[datetime] = None
+) -> List[str]:
+    cutoff = retention_cutoff(now)
+    if cutoff is None:
+        return []
+    dropped = []
+    for name in _partitions(connection):
+        match = _PARTITION_RE.match(name)
+        if match is None:
+            continue
+        month = datetime(int(match.group(1)), int(match.group(2)), 1)
+        if month_start(month, 1) <= cutoff:
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    # Plays that predate every monthly partition land in the default one;
+    # it stays small, so it is trimmed with a plain DELETE.
+    connection.execute(
+        text("DELETE FROM history_default WHERE played_at < :cutoff"),
+        {"cutoff": cutoff},
+    )
+    return dropped
+
+
+def maintain_history_partitions(now: Optional[datetime] = None) -> None:
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return
+        created = ensure_history_partitions(connection, now)
+        dropped = drop_expired_history_partitions(connection, now)
+    if created or dropped:
+        logger.info(
+            "History partitions created: %s, dropped: %s", created, dropped
+        )
+
+
+async def run_history_partition_maintenance(
+    interval: float = HISTORY_PARTITION_MAINTENANCE_INTERVAL,
+) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(maintain_history_partitions)
+        except Exception:
+            logger.exception("History partition maintenance failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+from contextlib import suppress
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import AsyncSessionLocal
+from app.models.history import History
+from app.utils.track_metadata import insert_track_metadata
+
+load_dotenv()
+HISTORY_WRITE_BEHIND = os.environ.get("HISTORY_WRITE_BEHIND", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", 500))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("HISTORY_FLUSH_INTERVAL", 1))
+HISTORY_MAX_PENDING = int(os.environ.get("HISTORY_MAX_PENDING", 10000))
+HISTORY_ENQUEUE_TIMEOUT = float(os.environ.get("HISTORY_ENQUEUE_TIMEOUT", 0.5))
+HISTORY_MAX_FLUSH_ATTEMPTS = int(os.environ.get("HISTORY_MAX_FLUSH_ATTEMPTS", 10))
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryBackpressure(Exception):
+    pass
+
+
+class HistoryBatchTooLarge(Exception):
+    pass
+
+
+class HistoryWriter:
+    # Play events are buffered and written as multi-row INSERTs, one
+    # transaction per batch. Rows stay in the buffer until their batch has
+    # been committed, so a failed flush is retried on the next tick and the
+    # buffer size bounds everything not yet durable. A batch that fails
+    # max_flush_attempts times in a row is dropped so it cannot wedge the
+    # buffer.
+    def __init__(
+        self,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        max_pending: int = HISTORY_MAX_PENDING,
+        enqueue_timeout: float = HISTORY_ENQUEUE_TIMEOUT,
+        max_flush_attempts: int = HISTORY_MAX_FLUSH_ATTEMPTS,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.max_flush_attempts = max_flush_attempts
+        self._buffer: List[Dict[str, Any]] = []
+        self._failed_attempts = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "rejected": 0,
+            "dropped": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "pending": len(self._buffer)}
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # The loop is asked to exit rather than cancelled, so a flush in
+            # progress commits (or fails) as a whole before the final one.
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._lock is not None:
+            await self.flush()
+        if self._buffer:
+            logger.error("Dropping %d unwritten history events", len(self._buffer))
+            self._stats["dropped"] += len(self._buffer)
+            self._buffer.clear()
+
+    async def enqueue(self, rows: List[Dict[str, Any]]) -> None:
+        if len(rows) > self.max_pending:
+            raise HistoryBatchTooLarge(
+                f"at most {self.max_pending} history events can be queued at once"
+            )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.enqueue_timeout
+        # A batch is accepted whole or not at all, so a client retrying a
+        # rejected upload never duplicates part of it.
+        while len(self._buffer) + len(rows) > self.max_pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self._stats["rejected"] += len(rows)
+                raise HistoryBackpressure("history buffer is full")
+            self._drained.clear()
+            self._wakeup.set()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._drained.wait(), remaining)
+        self._buffer.extend(rows)
+        self._stats["enqueued"] += len(rows)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            while self._buffer:
+                batch = self._buffer[: self.batch_size]
+                try:
+                    await write_history_rows(batch)
+                except Exception:
+                    self._stats["flush_errors"] += 1
+                    self._failed_attempts += 1
+                    if self._failed_attempts < self.max_flush_attempts:
+                        logger.exception(
+                            "Failed to write %d history events", len(batch)
+                        )
+                        return
+                    logger.exception(
+                        "Dropping %d history events after %d failed writes",
+                        len(batch),
+                        self._failed_attempts,
+                    )
+                    self._stats["dropped"] += len(batch)
+                else:
+                    self._stats["written"] += len(batch)
+                    self._stats["flushes"] += 1
+                self._failed_attempts = 0
+                del self._buffer[: len(batch)]
+                self._drained.set()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+
+HISTORY_COLUMNS = ("user_id", "track_id", "played_at")
+
+
+async def insert_history_rows(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+    await insert_track_metadata(db, rows)
+    result = await db.execute(
+        insert(History)
+        .values([{column: row[column] for column in HISTORY_COLUMNS} for row in rows])
+        .returning(History.id)
+    )
+    return result.scalars().all()
+
+
+async def write_history_rows(rows: List[Dict[str, Any]]) -> None:
+    async with AsyncSessionLocal() as db:
+        await insert_history_rows(db, rows)
+        await db.commit()
+
+
+history_writer = HistoryWriter()
@@ -0,0 +1,224 @@
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+load_dotenv()
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "playpod_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "playpod_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "playpod_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ("engine",),
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "playpod_db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after DB_POOL_TIMEOUT",
+    ("engine",),
+)
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "playpod_upstream_request_duration_seconds",
+    "Upstream API latency by endpoint",
+    ("service", "endpoint"),
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "playpod_upstream_errors_total",
+    "Failed upstream API calls by endpoint and reason",
+    ("service", "endpoint", "reason"),
+)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_template(path: str) -> str:
+    # Keeps label cardinality bounded: /track/3135556 -> /track/{id}.
+    return _NUMERIC_SEGMENT.sub("/{id}", path)
+
+
+def count_upstream_error(service: str, endpoint: str, reason: str) -> None:
+    UPSTREAM_ERRORS.labels(service, endpoint, reason).inc()
+
+
+def observe_upstream(
+    service: str, endpoint: str, started: float, error: Optional[str] = None
+) -> None:
+    UPSTREAM_REQUEST_DURATION.labels(service, endpoint).observe(
+        time.perf_counter() - started
+    )
+    if error is not None:
+        count_upstream_error(service, endpoint, error)
+
+
+def instrument_pool(pool, engine_name: str) -> None:
+    # The pool has no "before checkout" event, so the blocking _do_get is
+    # timed directly. It is called once per checkout, including waits.
+    do_get = pool._do_get
+    wait = DB_POOL_CHECKOUT_WAIT.labels(engine_name)
+    timeouts = DB_POOL_CHECKOUT_TIMEOUTS.labels(engine_name)
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        except PoolTimeoutError:
+            timeouts.inc()
+            raise
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+
+class PoolCollector(Collector):
+    # Pool occupancy is read at scrape time, so it costs nothing per request.
+    def __init__(self, pools: Dict[str, Any]):
+        self.pools = pools
+
+    def collect(self) -> Iterable:
+        size = GaugeMetricFamily(
+            "playpod_db_pool_size", "Configured pool size", labels=("engine",)
+        )
+        checked_out = GaugeMetricFamily(
+            "playpod_db_pool_checked_out",
+            "Connections currently checked out",
+            labels=("engine",),
+        )
+        overflow = GaugeMetricFamily(
+            "playpod_db_pool_overflow",
+            "Connections opened beyond the pool size",
+            labels=("engine",),
+        )
+        for name, pool in self.pools.items():
+            if not hasattr(pool, "checkedout"):
+                continue
+            size.add_metric((name,), pool.size())
+            checked_out.add_metric((name,), pool.checkedout())
+            overflow.add_metric((name,), max(pool.overflow(), 0))
+        yield size
+        yield checked_out
+        yield overflow
+
+
+CACHE_RESULTS = ("hits", "stale_hits", "misses", "coalesced", "stale_if_error")
+
+
+class CacheCollector(Collector):
+    # Reads the stats() dicts the caches already keep, so lookups are not
+    # slowed down by a second set of counters.
+    def __init__(self):
+        self.sources: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def watch(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self.sources.append((name, stats))
+
+    def collect(self) -> Iterable:
+        lookups = CounterMetricFamily(
+            "playpod_cache_lookups",
+            "Cache lookups by result",
+            labels=("cache", "result"),
+        )
+        hit_ratio = GaugeMetricFamily(
+            "playpod_cache_hit_ratio",
+            "Share of lookups served from the cache, stale hits included",
+            labels=("cache",),
+        )
+        for name, stats_fn in self.sources:
+            stats = stats_fn()
+            hits = stats.get("hits", 0) + stats.get("stale_hits", 0)
+            total = hits + stats.get("misses", 0)
+            for result in CACHE_RESULTS:
+                if result in stats:
+                    lookups.add_metric((name, result), stats[result])
+            hit_ratio.add_metric((name,), hits / total if total else 0.0)
+        yield lookups
+        yield hit_ratio
+
+
+class HistoryWriterCollector(Collector):
+    def __init__(self, writer):
+        self.writer = writer
+
+    def collect(self) -> Iterable:
+        stats = self.writer.stats()
+        pending = GaugeMetricFamily(
+            "playpod_history_writer_pending", "History events waiting to be written"
+        )
+        pending.add_metric((), stats["pending"])
+        yield pending
+        events = CounterMetricFamily(
+            "playpod_history_writer_events",
+            "History events by outcome",
+            labels=("outcome",),
+        )
+        for outcome in ("enqueued", "written", "rejected", "dropped"):
+            events.add_metric((outcome,), stats[outcome])
+        yield events
+        flushes = CounterMetricFamily(
+            "playpod_history_writer_flushes",
+            "History buffer flushes by outcome",
+            labels=("outcome",),
+        )
+        flushes.add_metric(("ok",), stats["flushes"])
+        flushes.add_metric(("error",), stats["flush_errors"])
+        yield flushes
+
+
+class BreakerCollector(Collector):
+    def __init__(self, service: str, breakers):
+        self.service = service
+        self.breakers = breakers
+
+    def collect(self) -> Iterable:
+        is_open = GaugeMetricFamily(
+            "playpod_upstream_circuit_open",
+            "1 while the endpoint's circuit is open or half-open",
+            labels=("service", "endpoint"),
+        )
+        rejected = CounterMetricFamily(
+            "playpod_upstream_circuit_rejected",
+            "Calls failed fast by an open circuit",
+            labels=("service", "endpoint"),
+        )
+        for endpoint, stats in self.breakers.stats().items():
+            is_open.add_metric(
+                (self.service, endpoint), 0 if stats["state"] == "closed" else 1
+            )
+            rejected.add_metric((self.service, endpoint), stats["rejected"])
+        yield is_open
+        yield rejected
+
+
+cache_collector = CacheCollector()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,49 @@
+import base64
+import os
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+import orjson
+from fastapi import HTTPException, Query, status
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 100))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = orjson.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    )
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, values)
+        ]
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def page_size(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> int:
+    return limit
+
+
+def build_page(
+    rows: Sequence[Any], limit: int, cursor_key: Callable[[Any], Sequence[Any]]
+) -> dict:
+    items = list(rows[:limit])
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(cursor_key(items[-1]))
+    return {"items": items, "next_cursor": next_cursor}
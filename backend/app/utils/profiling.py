@@ -0,0 +1,136 @@
+import logging
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from app.database.database import async_engine, engine
+
+load_dotenv()
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 1.0))
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    __slots__ = ("scope", "started", "statements", "db_time", "upstream_time", "upstream_calls")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.upstream_time = 0.0
+        self.upstream_calls = 0
+
+    @property
+    def route(self) -> str:
+        # The route template is only known once routing has run.
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', self.scope['path'])}"
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started
+        # Upstream calls made concurrently are summed, so "app" is clamped
+        # rather than allowed to go negative.
+        app_time = max(total - self.db_time - self.upstream_time, 0.0)
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries", '
+            f'upstream;dur={self.upstream_time * 1000:.1f};desc="{self.upstream_calls} calls", '
+            f"app;dur={app_time * 1000:.1f}"
+        )
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def start_profile(
+    scope: dict, sample_rate: float = PROFILING_SAMPLE_RATE
+) -> Optional[RequestProfile]:
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return None
+    profile = RequestProfile(scope)
+    current_profile.set(profile)
+    return profile
+
+
+def record_upstream(started: float) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.upstream_time += time.perf_counter() - started
+        profile.upstream_calls += 1
+
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_ROWS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+def normalize_sql(statement: str) -> str:
+    # Collapses literals, placeholder lists and multi-row VALUES so the same
+    # query shape always logs identically, whatever its parameters.
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?)", sql)
+    return _REPEATED_ROWS.sub(r"\1, ...", sql)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profile.statements += 1
+    profile.db_time += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s",
+            elapsed * 1000,
+            profile.route,
+            normalize_sql(statement),
+        )
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute, so its start
+    # time is dropped here to keep the per-connection stack balanced.
+    conn = exception_context.connection
+    if conn is not None:
+        started = conn.info.get("query_started")
+        if started:
+            started.pop()
+
+
+def install_query_profiler() -> None:
+    for target in (engine, async_engine.sync_engine):
+        if event.contains(target, "before_cursor_execute", _before_cursor_execute):
+            continue
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
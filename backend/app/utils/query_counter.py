@@ -0,0 +1,49 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+
+from app.database.database import async_engine, engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    # Counts every statement sent through the sync and async engines while
+    # active. It is process-wide, so it is meant for tests and benchmark
+    # scripts driving one request at a time, not for production traffic.
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+        self._engines = (engine, async_engine.sync_engine)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        for target in self._engines:
+            event.listen(target, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for target in self._engines:
+            event.remove(target, "before_cursor_execute", self._record)
+
+
+@contextmanager
+def query_budget(limit: int, label: str = "block") -> Iterator[QueryCounter]:
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(f"  {s}" for s in counter.statements)
+        raise QueryBudgetExceeded(
+            f"{label} ran {counter.count} queries, budget is {limit}:\n{statements}"
+        )
@@ -0,0 +1,171 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.retry_after = retry_after
+
+
+class RateLimitTimeout(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("upstream rate limit queue is full")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures and rejects calls
+    # for recovery_timeout seconds. Then up to half_open_max trial calls are
+    # let through: a success closes the circuit, a failure reopens it.
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+        half_open_max: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max = half_open_max
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        if self.state == OPEN:
+            remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = HALF_OPEN
+            self.trials = 0
+        if self.state == HALF_OPEN:
+            if self.trials >= self.half_open_max:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout)
+            self.trials += 1
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_cancelled(self) -> None:
+        # A cancelled trial call proves nothing either way; give its slot
+        # back so the circuit does not stay half-open forever.
+        if self.state == HALF_OPEN and self.trials > 0:
+            self.trials -= 1
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class RetryBudget:
+    # Every first attempt deposits `ratio` of a retry and every retry
+    # withdraws one, so retries stay a fixed share of traffic. During a
+    # brownout that share is all the extra load we add. min_per_second
+    # keeps low-traffic periods able to retry at all.
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1, max_tokens: float = 100):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self, amount: float) -> None:
+        now = time.monotonic()
+        amount += (now - self.updated_at) * self.min_per_second
+        self.updated_at = now
+        self.tokens = min(self.max_tokens, self.tokens + amount)
+
+    def record_request(self) -> None:
+        self._refill(self.ratio)
+
+    def try_retry(self) -> bool:
+        self._refill(0)
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": round(self.tokens, 2),
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+        }
+
+
+class TokenBucket:
+    # Callers reserve a token up front and sleep until it is due. A burst
+    # therefore queues behind the limiter instead of hitting the upstream
+    # quota. When the wait would exceed max_wait, the call is refused.
+    def __init__(self, rate: float, burst: float, max_wait: float = 5):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.queued = 0
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if wait > self.max_wait:
+            raise RateLimitTimeout(wait)
+        self.tokens -= 1
+        return wait
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            self.queued += 1
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tokens": round(self.tokens, 2), "queued": self.queued}
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    # "Full jitter": spreads retries from many callers over the whole window.
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class BreakerRegistry:
+    def __init__(self, **options: Any):
+        self.options = options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name, **self.options)
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: breaker.stats() for key, breaker in self._breakers.items()}
@@ -0,0 +1,149 @@
+import re
+from typing import List
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table, text
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.album import Album
+from app.models.track import Track
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# SQLite has no tsvector, so local databases get FTS5 tables kept in sync
+# with the catalog tables by triggers. Postgres uses the generated
+# search_vector columns added by the search index migration.
+_FTS_TABLES = {
+    "tracks": ("title", "artist", "genre"),
+    "albums": ("title", "artist"),
+}
+
+
+def tokenize(query: str) -> List[str]:
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _sqlite_fts_ddl(source: str, columns: tuple) -> List[str]:
+    fts = f"{source}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{source}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', "
+        f"prefix='2 3')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN {delete} END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {source} BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_index(connection: Connection) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for source, columns in _FTS_TABLES.items():
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": f"{source}_fts"},
+        ).first()
+        if exists:
+            continue
+        for statement in _sqlite_fts_ddl(source, columns):
+            connection.execute(text(statement))
+
+
+def _postgres_search(model, columns, tokens: List[str], limit: int, offset: int):
+    tsquery = func.to_tsquery(
+        literal("simple", REGCONFIG), " & ".join(f"{token}:*" for token in tokens)
+    )
+    search_vector = literal_column(f"{model.__tablename__}.search_vector", TSVECTOR)
+    return (
+        select(*columns)
+        .where(search_vector.op("@@")(tsquery))
+        .order_by(func.ts_rank(search_vector, tsquery).desc(), model.id)
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+def _postgres_fuzzy_search(model, columns, query: str, limit: int):
+    return (
+        select(*columns)
+        .where(or_(model.title.op("%")(query), model.artist.op("%")(query)))
+        .order_by(func.similarity(model.title, query).desc(), model.id)
+        .limit(limit)
+    )
+
+
+def _sqlite_search(model, columns, tokens: List[str], limit: int, offset: int):
+    fts = table(f"{model.__tablename__}_fts", column("rowid"), column("rank"))
+    match = " ".join(f'"{token}"*' for token in tokens)
+    return (
+        select(*columns)
+        .join(fts, fts.c.rowid == model.id)
+        .where(text(f"{fts.name} MATCH :match").bindparams(match=match))
+        .order_by(fts.c.rank, model.id)
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+def _like_search(model, columns, fields, query: str, limit: int, offset: int):
+    return (
+        select(*columns)
+        .where(or_(*(field.ilike(f"%{query}%") for field in fields)))
+        .order_by(model.id)
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+async def _search(
+    db: AsyncSession, model, columns, fields, query: str, limit: int, offset: int
+) -> list:
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    # Without explicit columns the ORM entities are returned; with them,
+    # plain rows of just those columns.
+    selected = columns or (model,)
+
+    async def fetch(statement) -> list:
+        result = await db.execute(statement)
+        return result.all() if columns else result.scalars().all()
+
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        rows = await fetch(_postgres_search(model, selected, tokens, limit, offset))
+        if not rows and offset == 0:
+            # Nothing matched as a prefix; fall back to trigram similarity
+            # so misspelled queries still find something.
+            rows = await fetch(_postgres_fuzzy_search(model, selected, query, limit))
+        return rows
+    if dialect == "sqlite":
+        return await fetch(_sqlite_search(model, selected, tokens, limit, offset))
+    return await fetch(_like_search(model, selected, fields, query, limit, offset))
+
+
+async def search_tracks(
+    db: AsyncSession, query: str, limit: int = 10, offset: int = 0, columns=None
+) -> list:
+    return await _search(
+        db, Track, columns, (Track.title, Track.artist, Track.genre), query, limit, offset
+    )
+
+
+async def search_albums(
+    db: AsyncSession, query: str, limit: int = 10, offset: int = 0, columns=None
+) -> list:
+    return await _search(
+        db, Album, columns, (Album.title, Album.artist), query, limit, offset
+    )
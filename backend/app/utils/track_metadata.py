@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import AsyncSessionLocal
+from app.models.track_metadata import TrackMetadata
+from app.utils.upsert import dialect_insert
+
+METADATA_FIELDS = ("title", "artist", "audio_url", "cover_image", "duration")
+
+logger = logging.getLogger(__name__)
+_pending_refreshes = set()
+
+
+def _latest_rows(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # One row per track (the last one wins); a multi-row ON CONFLICT may not
+    # touch the same row twice.
+    return list(
+        {
+            row["track_id"]: {
+                "track_id": row["track_id"],
+                **{field: row[field] for field in METADATA_FIELDS},
+                "updated_at": datetime.utcnow(),
+            }
+            for row in rows
+        }.values()
+    )
+
+
+async def insert_track_metadata(db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+    # The row is shared by every user who saved or played the track, so a
+    # client payload may only create it, never rewrite it.
+    latest = _latest_rows(rows)
+    if not latest:
+        return
+    await db.execute(
+        dialect_insert(db, TrackMetadata)
+        .values(latest)
+        .on_conflict_do_nothing(index_elements=["track_id"])
+    )
+
+
+def deezer_track_metadata(track: Dict[str, Any]) -> Dict[str, Any]:
+    # Same mapping the frontend applies before it saves a Deezer track.
+    return {
+        "track_id": str(track["id"]),
+        "title": track.get("title"),
+        "artist": (track.get("artist") or {}).get("name"),
+        "audio_url": track.get("preview"),
+        "cover_image": (track.get("album") or {}).get("cover_small"),
+        "duration": track.get("duration"),
+    }
+
+
+async def refresh_track_metadata(db: AsyncSession, row: Dict[str, Any]) -> None:
+    # Only for trusted sources. Rows nobody saved are not created, and
+    # unchanged metadata skips the update so hot tracks do not churn.
+    columns = TrackMetadata.__table__.c
+    await db.execute(
+        update(TrackMetadata)
+        .where(
+            columns.track_id == row["track_id"],
+            or_(*(columns[field].is_distinct_from(row[field]) for field in METADATA_FIELDS)),
+        )
+        .values(
+            **{field: row[field] for field in METADATA_FIELDS},
+            updated_at=datetime.utcnow(),
+        )
+    )
+
+
+async def refresh_track_metadata_from_deezer(track: Dict[str, Any]) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await refresh_track_metadata(db, deezer_track_metadata(track))
+            await db.commit()
+    except Exception:
+        logger.exception("Failed to refresh metadata for Deezer track %s", track.get("id"))
+
+
+def schedule_deezer_metadata_refresh(track: Dict[str, Any]) -> None:
+    # Runs beside the fetch so a slow database never delays Deezer reads;
+    # the set keeps the task referenced until it finishes.
+    task = asyncio.ensure_future(refresh_track_metadata_from_deezer(track))
+    _pending_refreshes.add(task)
+    task.add_done_callback(_pending_refreshes.discard)
+
+
+async def wait_for_metadata_refreshes() -> None:
+    if _pending_refreshes:
+        await asyncio.gather(*_pending_refreshes, return_exceptions=True)
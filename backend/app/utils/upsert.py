@@ -0,0 +1,17 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: AsyncSession, model):
+    # Both dialects support INSERT ... ON CONFLICT ... RETURNING (SQLite
+    # from 3.35), exposed through their own insert() constructs.
+    dialect = db.bind.dialect.name
+    try:
+        return _INSERTS[dialect](model)
+    except KeyError:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
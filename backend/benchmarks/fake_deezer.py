@@ -0,0 +1,186 @@
+"""Local stand-in for the Deezer API used by load tests.
+
+Run it next to the backend and point the backend at it:
+
+    python -m benchmarks.fake_deezer --port 9100 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+    DEEZER_BASE_URL=http://127.0.0.1:9100 uvicorn app.main:app
+
+Payloads are generated deterministically from the requested ids and queries,
+with the same shape (nested artist/album objects, long cover URLs) as the
+real API, so serialisation and caching costs are representative.
+"""
+import argparse
+import asyncio
+import random
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+COVER_BASE = "https://e-cdns-images.dzcdn.net/images/cover"
+ARTIST_BASE = "https://e-cdns-images.dzcdn.net/images/artist"
+
+
+class Settings:
+    latency_ms = 0.0
+    jitter_ms = 0.0
+    error_rate = 0.0
+    quota_error_rate = 0.0
+    missing_ids: set = set()
+    seed = 0
+
+
+settings = Settings()
+
+
+def _hash(value: Any) -> str:
+    return f"{random.Random(f'{settings.seed}:{value}').getrandbits(128):032x}"
+
+
+def artist(artist_id: int) -> Dict[str, Any]:
+    picture = f"{ARTIST_BASE}/{_hash(('artist', artist_id))}"
+    return {
+        "id": artist_id,
+        "name": f"Artist {artist_id}",
+        "link": f"https://www.deezer.com/artist/{artist_id}",
+        "picture": f"https://api.deezer.com/artist/{artist_id}/image",
+        "picture_small": f"{picture}/56x56-000000-80-0-0.jpg",
+        "picture_medium": f"{picture}/250x250-000000-80-0-0.jpg",
+        "picture_big": f"{picture}/500x500-000000-80-0-0.jpg",
+        "picture_xl": f"{picture}/1000x1000-000000-80-0-0.jpg",
+        "tracklist": f"https://api.deezer.com/artist/{artist_id}/top?limit=50",
+        "type": "artist",
+    }
+
+
+def album(album_id: int, with_tracks: bool = False) -> Dict[str, Any]:
+    cover = f"{COVER_BASE}/{_hash(('album', album_id))}"
+    payload = {
+        "id": album_id,
+        "title": f"Album {album_id}",
+        "cover": f"https://api.deezer.com/album/{album_id}/image",
+        "cover_small": f"{cover}/56x56-000000-80-0-0.jpg",
+        "cover_medium": f"{cover}/250x250-000000-80-0-0.jpg",
+        "cover_big": f"{cover}/500x500-000000-80-0-0.jpg",
+        "cover_xl": f"{cover}/1000x1000-000000-80-0-0.jpg",
+        "md5_image": _hash(("album", album_id)),
+        "genre_id": 132,
+        "nb_tracks": 12,
+        "record_type": "album",
+        "tracklist": f"https://api.deezer.com/album/{album_id}/tracks",
+        "explicit_lyrics": False,
+        "artist": artist(album_id % 5000),
+        "type": "album",
+    }
+    if with_tracks:
+        payload["tracks"] = {"data": [track(album_id * 100 + i) for i in range(12)]}
+    return payload
+
+
+def track(track_id: int) -> Dict[str, Any]:
+    album_id = track_id // 100 or 1
+    return {
+        "id": track_id,
+        "readable": True,
+        "title": f"Track {track_id}",
+        "title_short": f"Track {track_id}",
+        "link": f"https://www.deezer.com/track/{track_id}",
+        "duration": 120 + track_id % 240,
+        "rank": 900000 - track_id % 100000,
+        "explicit_lyrics": False,
+        "preview": f"https://cdns-preview-{track_id % 10}.dzcdn.net/stream/c-{_hash(('track', track_id))}-3.mp3",
+        "md5_image": _hash(("album", album_id)),
+        "artist": artist(album_id % 5000),
+        "album": album(album_id),
+        "type": "track",
+    }
+
+
+def _ids_for(query: str, count: int, offset: int = 1) -> list:
+    rng = random.Random(f"{settings.seed}:{query}")
+    return [rng.randrange(offset, offset + 10_000_000) for _ in range(count)]
+
+
+app = FastAPI(title="Fake Deezer")
+
+
+@app.middleware("http")
+async def inject_latency_and_errors(request: Request, call_next):
+    delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    if settings.error_rate and random.random() < settings.error_rate:
+        return JSONResponse({"error": {"type": "Exception", "code": 800}}, status_code=503)
+    if settings.quota_error_rate and random.random() < settings.quota_error_rate:
+        # The real API reports an exhausted quota as a 200 with an error body.
+        return JSONResponse(
+            {"error": {"type": "Exception", "message": "Quota limit exceeded", "code": 4}}
+        )
+    return await call_next(request)
+
+
+def no_data() -> Dict[str, Any]:
+    return {"error": {"type": "DataException", "message": "no data", "code": 800}}
+
+
+@app.get("/chart/0/tracks")
+async def chart(limit: int = 10):
+    return {"data": [track(i) for i in _ids_for("chart", limit, offset=100)], "total": limit}
+
+
+@app.get("/track/{track_id}")
+async def get_track(track_id: int):
+    if track_id in settings.missing_ids:
+        return no_data()
+    return track(track_id)
+
+
+@app.get("/album/{album_id}")
+async def get_album(album_id: int):
+    if album_id in settings.missing_ids:
+        return no_data()
+    return album(album_id, with_tracks=True)
+
+
+@app.get("/search")
+async def search(q: str, limit: int = 25):
+    return {"data": [track(i) for i in _ids_for(q, limit, offset=100)], "total": limit}
+
+
+@app.get("/search/album")
+async def search_albums(q: str, limit: int = 25):
+    return {"data": [album(i) for i in _ids_for(f"album:{q}", limit)], "total": limit}
+
+
+@app.get("/radio/{genre_id}/tracks")
+async def radio(genre_id: int, limit: int = 25):
+    return {"data": [track(i) for i in _ids_for(f"radio:{genre_id}", limit, offset=100)]}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local Deezer API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument(
+        "--quota-error-rate",
+        type=float,
+        default=0,
+        help="share of requests answered with Deezer's 200 quota-exceeded error",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    settings.latency_ms = args.latency_ms
+    settings.jitter_ms = args.jitter_ms
+    settings.error_rate = args.error_rate
+    settings.quota_error_rate = args.quota_error_rate
+    settings.seed = args.seed
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
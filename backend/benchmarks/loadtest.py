@@ -0,0 +1,235 @@
+"""Closed-loop load test against a running backend, reported as JSON.
+
+Typical run (three terminals, or backgrounded):
+
+    python -m benchmarks.fake_deezer --port 9100 --latency-ms 80 --jitter-ms 40
+    DATABASE_URL=sqlite:///./loadtest.db python -m benchmarks.seed --create-tables
+    DATABASE_URL=sqlite:///./loadtest.db DEEZER_BASE_URL=http://127.0.0.1:9100 \\
+        uvicorn app.main:app --port 8000
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 \\
+        --concurrency 50 --duration 60 --output results/baseline.json
+
+Each virtual user logs in as one of the seeded loadtest<N> accounts and then
+runs weighted scenarios back to back. Throughput and p50/p95/p99 latency are
+reported overall and per scenario, so two JSON files can be diffed to judge
+a change.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+USERNAME_PREFIX = "loadtest"
+PASSWORD = "loadtest"
+WORDS = (
+    "night", "summer", "love", "blue", "fire", "city", "dream", "river",
+    "light", "heart", "storm", "gold", "wild", "echo", "midnight", "road",
+)
+SCENARIO_WEIGHTS = {
+    "login": 2,
+    "search": 20,
+    "suggest": 15,
+    "deezer_search": 10,
+    "deezer_track": 10,
+    "history_write": 20,
+    "history_read": 10,
+    "favorite_toggle": 10,
+    "favorites_read": 5,
+}
+
+
+def track_payload(track_id: str) -> Dict[str, Any]:
+    # Matches the track_metadata rows written by benchmarks.seed, so favorites
+    # and history writes exercise the unchanged-metadata upsert path.
+    return {
+        "track_id": track_id,
+        "title": f"Track {track_id}",
+        "artist": f"Artist {int(track_id) % 5000}",
+        "audio_url": f"https://cdns-preview.dzcdn.net/stream/{track_id}.mp3",
+        "cover_image": f"https://e-cdns-images.dzcdn.net/images/cover/{track_id}.jpg",
+        "duration": 120 + int(track_id) % 240,
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, scenario: str, started: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies[scenario].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[scenario] += 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, index: int, args):
+        self.client = client
+        self.recorder = recorder
+        self.rng = random.Random(args.seed * 100003 + index)
+        self.username = f"{USERNAME_PREFIX}{index % args.seeded_users}"
+        self.deezer_tracks = args.deezer_tracks
+        self.headers: Dict[str, str] = {}
+
+    async def request(self, scenario: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(scenario, started, False)
+            return None
+        self.recorder.record(scenario, started, response.status_code < 400)
+        return response
+
+    async def login(self) -> None:
+        response = await self.request(
+            "login",
+            "POST",
+            "/api/login",
+            json={"username": self.username, "password": PASSWORD},
+        )
+        if response is not None and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _track(self) -> Dict[str, Any]:
+        return track_payload(str(100 + self.rng.randrange(self.deezer_tracks)))
+
+    async def search(self) -> None:
+        await self.request("search", "GET", "/api/search", params={"q": self.rng.choice(WORDS)})
+
+    async def suggest(self) -> None:
+        word = self.rng.choice(WORDS)
+        await self.request(
+            "suggest", "GET", "/api/search/suggest", params={"q": word[: self.rng.randint(2, len(word))]}
+        )
+
+    async def deezer_search(self) -> None:
+        await self.request("deezer_search", "GET", "/api/deezer/search", params={"q": self.rng.choice(WORDS)})
+
+    async def deezer_track(self) -> None:
+        track_id = 100 + self.rng.randrange(self.deezer_tracks)
+        await self.request("deezer_track", "GET", f"/api/deezer/tracks/{track_id}")
+
+    async def history_write(self) -> None:
+        await self.request("history_write", "POST", "/api/history", json=self._track())
+
+    async def history_read(self) -> None:
+        await self.request("history_read", "GET", "/api/history", params={"limit": 50})
+
+    async def favorite_toggle(self) -> None:
+        track = self._track()
+        await self.request("favorite_toggle", "POST", "/api/favorites", json=track)
+        await self.request("favorite_toggle", "DELETE", f"/api/favorites/{track['track_id']}")
+
+    async def favorites_read(self) -> None:
+        await self.request("favorites_read", "GET", "/api/favorites")
+
+    async def run(self, scenarios: List[str], weights: List[int], stop_at: float) -> None:
+        await self.login()
+        while time.perf_counter() < stop_at:
+            scenario = self.rng.choices(scenarios, weights)[0]
+            await getattr(self, scenario)()
+
+
+async def run_load(args) -> Dict[str, Any]:
+    weights = dict(SCENARIO_WEIGHTS)
+    for override in args.weight:
+        name, _, value = override.partition("=")
+        if name not in weights:
+            sys.exit(f"Unknown scenario: {name}")
+        weights[name] = int(value)
+    scenarios = [name for name, weight in weights.items() if weight > 0]
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started_at = datetime.now(timezone.utc)
+        stop_at = time.perf_counter() + args.warmup + args.duration
+        users = [VirtualUser(client, recorder, i, args) for i in range(args.concurrency)]
+        tasks = [
+            asyncio.create_task(user.run(scenarios, [weights[s] for s in scenarios], stop_at))
+            for user in users
+        ]
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - measured_from
+
+    all_latencies = [value for values in recorder.latencies.values() for value in values]
+    return {
+        "label": args.label,
+        "started_at": started_at.isoformat(),
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "weights": {name: weights[name] for name in scenarios},
+        "total": summarize(all_latencies, sum(recorder.errors.values()), elapsed),
+        "scenarios": {
+            name: summarize(values, recorder.errors[name], elapsed)
+            for name, values in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="PlayPod load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before recording")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seeded-users", type=int, default=200)
+    parser.add_argument("--deezer-tracks", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="")
+    parser.add_argument(
+        "--weight",
+        action="append",
+        default=[],
+        metavar="SCENARIO=N",
+        help=f"override a scenario weight; scenarios: {', '.join(SCENARIO_WEIGHTS)}",
+    )
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
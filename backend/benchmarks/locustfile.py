@@ -0,0 +1,76 @@
+"""Locust version of the load-test scenarios, for interactive runs.
+
+Needs `pip install locust`; the same weights as benchmarks.loadtest are used:
+
+    locust -f benchmarks/locustfile.py --host http://127.0.0.1:8000 \\
+        --users 50 --spawn-rate 10 --run-time 1m --headless --json
+"""
+import itertools
+import random
+
+from locust import HttpUser, between, task
+
+from benchmarks.loadtest import PASSWORD, SCENARIO_WEIGHTS, USERNAME_PREFIX, WORDS, track_payload
+
+SEEDED_USERS = 200
+DEEZER_TRACKS = 5000
+_user_numbers = itertools.count()
+
+
+def _track():
+    return track_payload(str(100 + random.randrange(DEEZER_TRACKS)))
+
+
+class PlayPodUser(HttpUser):
+    wait_time = between(0, 0.1)
+
+    def on_start(self):
+        self.username = f"{USERNAME_PREFIX}{next(_user_numbers) % SEEDED_USERS}"
+        self.login()
+
+    @task(SCENARIO_WEIGHTS["login"])
+    def login(self):
+        response = self.client.post(
+            "/api/login", json={"username": self.username, "password": PASSWORD}, name="login"
+        )
+        if response.status_code == 200:
+            self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    @task(SCENARIO_WEIGHTS["search"])
+    def search(self):
+        self.client.get("/api/search", params={"q": random.choice(WORDS)}, name="search")
+
+    @task(SCENARIO_WEIGHTS["suggest"])
+    def suggest(self):
+        word = random.choice(WORDS)
+        self.client.get(
+            "/api/search/suggest", params={"q": word[: random.randint(2, len(word))]}, name="suggest"
+        )
+
+    @task(SCENARIO_WEIGHTS["deezer_search"])
+    def deezer_search(self):
+        self.client.get("/api/deezer/search", params={"q": random.choice(WORDS)}, name="deezer_search")
+
+    @task(SCENARIO_WEIGHTS["deezer_track"])
+    def deezer_track(self):
+        self.client.get(
+            f"/api/deezer/tracks/{100 + random.randrange(DEEZER_TRACKS)}", name="deezer_track"
+        )
+
+    @task(SCENARIO_WEIGHTS["history_write"])
+    def history_write(self):
+        self.client.post("/api/history", json=_track(), name="history_write")
+
+    @task(SCENARIO_WEIGHTS["history_read"])
+    def history_read(self):
+        self.client.get("/api/history", params={"limit": 50}, name="history_read")
+
+    @task(SCENARIO_WEIGHTS["favorite_toggle"])
+    def favorite_toggle(self):
+        track = _track()
+        self.client.post("/api/favorites", json=track, name="favorite_toggle")
+        self.client.delete(f"/api/favorites/{track['track_id']}", name="favorite_toggle")
+
+    @task(SCENARIO_WEIGHTS["favorites_read"])
+    def favorites_read(self):
+        self.client.get("/api/favorites", name="favorites_read")
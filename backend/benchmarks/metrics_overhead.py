@@ -0,0 +1,60 @@
+"""Measure the per-request cost of MetricsMiddleware.
+
+Drives a bare ASGI app directly, with and without the middleware, so the
+difference is the instrumentation alone (no HTTP parsing, routing or I/O):
+
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.middleware.metrics import MetricsMiddleware
+
+ROUTE = SimpleNamespace(path="/api/tracks/{track_id}")
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/api/tracks/1"}
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="MetricsMiddleware overhead")
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    instrumented = MetricsMiddleware(endpoint)
+    bare, metered = [], []
+    for _ in range(args.rounds):
+        bare.append(asyncio.run(run(endpoint, args.requests)))
+        metered.append(asyncio.run(run(instrumented, args.requests)))
+    overhead = (min(metered) - min(bare)) / args.requests * 1e6
+    print(f"bare:         {min(bare) / args.requests * 1e6:.2f} us/request")
+    print(f"instrumented: {min(metered) / args.requests * 1e6:.2f} us/request")
+    print(f"overhead:     {overhead:.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
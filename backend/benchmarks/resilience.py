@@ -0,0 +1,265 @@
+"""Drive the Deezer client through injected faults and check it degrades.
+
+Run from the backend directory:
+
+    python -m benchmarks.resilience
+
+The client is pointed at benchmarks.fake_deezer in-process (ASGI transport),
+whose error rate is flipped per scenario. Each check prints ok/FAIL and the
+script exits 1 if any failed.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_db_path = os.path.join(tempfile.mkdtemp(), "resilience.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ.setdefault("DEEZER_BREAKER_FAILURE_THRESHOLD", "5")
+os.environ.setdefault("DEEZER_BREAKER_RECOVERY_TIMEOUT", "0.5")
+os.environ.setdefault("DEEZER_RETRY_BASE_DELAY", "0.001")
+os.environ.setdefault("DEEZER_RETRY_MAX_DELAY", "0.01")
+
+import httpx  # noqa: E402
+
+from app.database.database import async_engine, create_tables  # noqa: E402
+from app.utils import deezer  # noqa: E402
+from app.utils.track_metadata import wait_for_metadata_refreshes  # noqa: E402
+from app.utils.resilience import BreakerRegistry, RetryBudget, TokenBucket  # noqa: E402
+from benchmarks import fake_deezer  # noqa: E402
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return await self.transport.handle_async_request(request)
+
+
+transport = CountingTransport(httpx.ASGITransport(app=fake_deezer.app))
+failures = 0
+
+
+def check(name: str, passed: bool, detail: str) -> None:
+    global failures
+    if not passed:
+        failures += 1
+    print(f"{'ok  ' if passed else 'FAIL'}  {name}: {detail}")
+
+
+def reset(error_rate: float, quota_error_rate: float = 0.0, **breaker_options) -> None:
+    fake_deezer.settings.error_rate = error_rate
+    fake_deezer.settings.quota_error_rate = quota_error_rate
+    fake_deezer.settings.missing_ids = set()
+    deezer.deezer_breakers = BreakerRegistry(
+        failure_threshold=breaker_options.get(
+            "failure_threshold", deezer.DEEZER_BREAKER_FAILURE_THRESHOLD
+        ),
+        recovery_timeout=deezer.DEEZER_BREAKER_RECOVERY_TIMEOUT,
+    )
+    deezer.deezer_retry_budget = RetryBudget(
+        ratio=deezer.DEEZER_RETRY_BUDGET_RATIO, min_per_second=0, max_tokens=10
+    )
+    deezer.deezer_rate_limiter = TokenBucket(1000, 1000)
+    transport.calls = 0
+
+
+async def attempt(track_id: int):
+    try:
+        await deezer.get_deezer_track(track_id)
+        return None
+    except deezer.DeezerAPIError as e:
+        return e
+
+
+async def brownout_fails_fast() -> None:
+    reset(error_rate=1.0)
+    for track_id in range(1000, 1010):
+        await attempt(track_id)
+    upstream_calls = transport.calls
+    started = time.perf_counter()
+    errors = [await attempt(track_id) for track_id in range(2000, 2100)]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    check(
+        "breaker opens",
+        deezer.deezer_breakers.get("/track/{id}").state == "open",
+        f"{upstream_calls} upstream calls for the first 10 requests",
+    )
+    check(
+        "open circuit fails fast",
+        transport.calls == upstream_calls
+        and all(isinstance(e, deezer.DeezerUnavailable) for e in errors),
+        f"100 requests in {elapsed_ms:.1f} ms, {transport.calls - upstream_calls} upstream calls",
+    )
+
+
+async def stale_served_while_open() -> None:
+    reset(error_rate=1.0)
+    # Past both the fresh and the stale-while-revalidate windows, so only
+    # the stale-if-error fallback can serve it.
+    await deezer.deezer_cache.set(
+        "track:42", {"id": 42, "title": "cached"}, ttl=-(deezer.DEEZER_CACHE_STALE_TTL + 1)
+    )
+    for track_id in range(3000, 3010):
+        await attempt(track_id)
+    try:
+        value = await deezer.get_deezer_track(42)
+    except deezer.DeezerAPIError as e:
+        value = e
+    check(
+        "stale data served while open",
+        isinstance(value, dict) and value.get("title") == "cached",
+        repr(value),
+    )
+
+
+async def recovers_after_timeout() -> None:
+    reset(error_rate=1.0)
+    for track_id in range(4000, 4010):
+        await attempt(track_id)
+    fake_deezer.settings.error_rate = 0.0
+    await asyncio.sleep(deezer.DEEZER_BREAKER_RECOVERY_TIMEOUT + 0.1)
+    error = await attempt(4100)
+    state = deezer.deezer_breakers.get("/track/{id}").state
+    check("half-open trial closes the circuit", error is None and state == "closed", state)
+
+
+async def retries_stay_within_budget() -> None:
+    reset(error_rate=0.5, failure_threshold=10**6)
+    requests = 200
+    for track_id in range(5000, 5000 + requests):
+        await attempt(track_id)
+    retries = transport.calls - requests
+    allowed = 10 + deezer.DEEZER_RETRY_BUDGET_RATIO * requests
+    check(
+        "retries bounded by budget",
+        retries <= allowed,
+        f"{retries} retries for {requests} requests (budget {allowed:.0f}, "
+        f"unbounded would be ~{requests * 0.5 + requests * 0.25:.0f})",
+    )
+
+
+async def bursts_queue_behind_limiter() -> None:
+    reset(error_rate=0.0)
+    deezer.deezer_rate_limiter = TokenBucket(50, 10, max_wait=5)
+    started = time.perf_counter()
+    errors = await asyncio.gather(*(attempt(track_id) for track_id in range(6000, 6060)))
+    elapsed = time.perf_counter() - started
+    check(
+        "burst queues instead of failing",
+        not any(errors) and elapsed >= 0.9,
+        f"60 requests at 50/s (burst 10) took {elapsed:.2f}s",
+    )
+
+    deezer.deezer_rate_limiter = TokenBucket(1, 1, max_wait=0.5)
+    errors = await asyncio.gather(*(attempt(track_id) for track_id in range(7000, 7003)))
+    check(
+        "overlong queue is refused",
+        sum(isinstance(e, deezer.DeezerUnavailable) for e in errors) == 2,
+        f"{[type(e).__name__ if e else 'ok' for e in errors]}",
+    )
+
+
+async def quota_errors_trip_breaker() -> None:
+    reset(error_rate=0.0, quota_error_rate=1.0)
+    errors = [await attempt(track_id) for track_id in (9000, 9001, 9002)]
+    breaker = deezer.deezer_breakers.get("/track/{id}")
+    check(
+        "200 quota errors count as failures",
+        breaker.state == "open"
+        and all(isinstance(e, deezer.DeezerUnavailable) for e in errors),
+        f"breaker {breaker.state}, {[type(e).__name__ for e in errors]}",
+    )
+
+    reset(error_rate=0.0)
+    value = await deezer.get_deezer_track(9000)
+    check(
+        "quota error was not cached",
+        isinstance(value, dict) and "error" not in value and value.get("id") == 9000,
+        repr(value)[:80],
+    )
+
+
+async def missing_ids_are_not_found() -> None:
+    reset(error_rate=0.0)
+    fake_deezer.settings.missing_ids = {9500}
+    errors = [await attempt(9500), await attempt(9500)]
+    check(
+        "unknown id raises not found, uncached",
+        all(isinstance(e, deezer.DeezerNotFound) for e in errors)
+        and transport.calls == 2
+        and deezer.deezer_breakers.get("/track/{id}").state == "closed",
+        f"{[type(e).__name__ for e in errors]}, {transport.calls} upstream calls",
+    )
+
+
+async def route_reports_retry_after() -> None:
+    from app.main import app
+
+    reset(error_rate=1.0)
+    for track_id in range(8000, 8010):
+        await attempt(track_id)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/api/deezer/tracks/8100")
+    check(
+        "route answers 503 with Retry-After",
+        response.status_code == 503 and "retry-after" in response.headers,
+        f"{response.status_code} Retry-After={response.headers.get('retry-after')}",
+    )
+
+
+async def batch_maps_item_errors() -> None:
+    from app.main import app
+
+    reset(error_rate=0.0)
+    fake_deezer.settings.missing_ids = {9600}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post("/api/deezer/tracks:batch", json={"ids": [9601, 9600]})
+        items = response.json()["data"]
+        fake_deezer.settings.missing_ids = set()
+        fake_deezer.settings.quota_error_rate = 1.0
+        response = await client.post("/api/deezer/tracks:batch", json={"ids": [9700]})
+        items += response.json()["data"]
+    statuses = [item["error"]["status"] if "error" in item else 200 for item in items]
+    check(
+        "batch maps not found to 404 and quota to 503",
+        statuses == [200, 404, 503] and "retry_after" in items[2]["error"],
+        f"{statuses}",
+    )
+
+
+async def run() -> None:
+    create_tables()
+    deezer._client = httpx.AsyncClient(base_url="http://fake-deezer", transport=transport)
+    try:
+        await brownout_fails_fast()
+        await stale_served_while_open()
+        await recovers_after_timeout()
+        await retries_stay_within_budget()
+        await bursts_queue_behind_limiter()
+        await quota_errors_trip_breaker()
+        await missing_ids_are_not_found()
+        await route_reports_retry_after()
+        await batch_maps_item_errors()
+    finally:
+        await deezer.close_deezer_client()
+        await wait_for_metadata_refreshes()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    asyncio.run(run())
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
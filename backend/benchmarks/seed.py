@@ -0,0 +1,193 @@
+"""Generate a reproducible dataset for load tests.
+
+Uses DATABASE_URL like the app itself, so it works against SQLite or a
+migrated Postgres database:
+
+    DATABASE_URL=sqlite:///./loadtest.db python -m benchmarks.seed --create-tables
+    DATABASE_URL=postgresql://... alembic upgrade head && python -m benchmarks.seed
+
+Users are named loadtest0..N-1 and share the password "loadtest"; the load
+test scenarios log in with those credentials.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List
+
+from sqlalchemy import insert
+
+from app.database.database import create_tables, engine
+from app.models.album import Album
+from app.models.favorite import Favorite
+from app.models.history import History
+from app.models.track import Track
+from app.models.track_metadata import TrackMetadata
+from app.models.user import User
+from app.routes.users import get_password_hash
+from benchmarks.loadtest import PASSWORD, USERNAME_PREFIX, WORDS, track_payload
+
+GENRES = ("pop", "rock", "rap", "jazz", "classical", "electronic", "metal")
+CHUNK = 5000
+
+
+def _chunks(rows: Iterable[dict], size: int = CHUNK) -> Iterable[List[dict]]:
+    chunk: List[dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(connection, model, rows: Iterable[dict]) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        connection.execute(insert(model), chunk)
+        count += len(chunk)
+    return count
+
+
+def _insert_returning_ids(connection, model, rows: Iterable[dict]) -> List[int]:
+    ids: List[int] = []
+    for chunk in _chunks(rows):
+        result = connection.execute(insert(model).returning(model.id), chunk)
+        ids.extend(result.scalars().all())
+    return ids
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 3)))
+
+
+def seed(
+    users: int,
+    albums: int,
+    tracks_per_album: int,
+    deezer_tracks: int,
+    favorites_per_user: int,
+    plays_per_user: int,
+    seed_value: int = 0,
+) -> dict:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    password_hash = get_password_hash(PASSWORD)
+    deezer_ids = [str(100 + i) for i in range(deezer_tracks)]
+    counts = {}
+
+    with engine.begin() as connection:
+        user_ids = _insert_returning_ids(
+            connection,
+            User,
+            (
+                {
+                    "username": f"{USERNAME_PREFIX}{i}",
+                    "email": f"{USERNAME_PREFIX}{i}@example.com",
+                    "hashed_password": password_hash,
+                    "is_active": True,
+                }
+                for i in range(users)
+            ),
+        )
+        album_ids = _insert_returning_ids(
+            connection,
+            Album,
+            (
+                {
+                    "title": _title(rng),
+                    "artist": f"Artist {a % 500}",
+                    "cover_image": f"https://cdn.example.com/albums/{a}.jpg",
+                    "release_date": now - timedelta(days=rng.randint(0, 3650)),
+                }
+                for a in range(albums)
+            ),
+        )
+        counts["users"] = len(user_ids)
+        counts["albums"] = len(album_ids)
+        counts["tracks"] = _insert(
+            connection,
+            Track,
+            (
+                {
+                    "title": _title(rng),
+                    "artist": f"Artist {album_id % 500}",
+                    "genre": rng.choice(GENRES),
+                    "audio_url": f"https://cdn.example.com/tracks/{album_id}-{t}.mp3",
+                    "cover_image": f"https://cdn.example.com/albums/{album_id}.jpg",
+                    "duration": float(rng.randint(90, 420)),
+                    "album_id": album_id,
+                }
+                for album_id in album_ids
+                for t in range(tracks_per_album)
+            ),
+        )
+        counts["track_metadata"] = _insert(
+            connection,
+            TrackMetadata,
+            (
+                {**track_payload(track_id), "updated_at": now}
+                for track_id in deezer_ids
+            ),
+        )
+        counts["favorites"] = _insert(
+            connection,
+            Favorite,
+            (
+                {"user_id": user_id, "track_id": track_id}
+                for user_id in user_ids
+                for track_id in rng.sample(deezer_ids, min(favorites_per_user, len(deezer_ids)))
+            ),
+        )
+        counts["history"] = _insert(
+            connection,
+            History,
+            (
+                {
+                    "user_id": user_id,
+                    "track_id": rng.choice(deezer_ids),
+                    "played_at": now - timedelta(seconds=rng.randint(0, 90 * 86400)),
+                }
+                for user_id in user_ids
+                for _ in range(plays_per_user)
+            ),
+        )
+    return counts
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Seed a load-test dataset")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--albums", type=int, default=2000)
+    parser.add_argument("--tracks-per-album", type=int, default=10)
+    parser.add_argument("--deezer-tracks", type=int, default=5000)
+    parser.add_argument("--favorites-per-user", type=int, default=50)
+    parser.add_argument("--plays-per-user", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--create-tables",
+        action="store_true",
+        help="create the schema with create_all instead of relying on migrations",
+    )
+    args = parser.parse_args(argv)
+
+    if args.create_tables:
+        create_tables()
+    started = time.perf_counter()
+    counts = seed(
+        args.users,
+        args.albums,
+        args.tracks_per_album,
+        args.deezer_tracks,
+        args.favorites_per_user,
+        args.plays_per_user,
+        args.seed,
+    )
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{name}={count}" for name, count in counts.items())
+    print(f"Seeded {summary} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare the ORM + response_model read path with the column/orjson one.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --rows 100 --requests 2000
+
+Both endpoints serve the same 100-row page of tracks from a throwaway
+SQLite database, so the difference is object construction, validation and
+JSON encoding.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ.setdefault("CATALOG_INDEX_ENABLED", "false")
+os.environ.setdefault("GENRE_ALBUMS_REFRESH_INTERVAL", "0")
+os.environ.setdefault("HISTORY_PARTITION_MAINTENANCE_INTERVAL", "0")
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database.database import SessionLocal, create_tables, get_db  # noqa: E402
+from app.models.album import Album as AlbumModel  # noqa: E402
+from app.models.track import Track as TrackModel  # noqa: E402
+from app.routes import tracks  # noqa: E402
+from app.schemas.pagination import Page  # noqa: E402
+from app.schemas.track import Track  # noqa: E402
+from app.utils.pagination import build_page  # noqa: E402
+
+
+def seed(rows: int) -> None:
+    create_tables()
+    db = SessionLocal()
+    try:
+        album = AlbumModel(title="Benchmark", artist="Various")
+        db.add(album)
+        db.flush()
+        db.add_all(
+            TrackModel(
+                title=f"Track {i}",
+                artist=f"Artist {i % 97}",
+                genre="pop",
+                audio_url=f"https://cdn.example.com/{i}.mp3",
+                cover_image=f"https://cdn.example.com/{i}.jpg",
+                duration=180.0 + i % 60,
+                album_id=album.id,
+            )
+            for i in range(rows * 2)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(tracks.router, prefix="/api")
+
+    @app.get("/legacy/tracks", response_model=Page[Track])
+    def legacy_tracks(limit: int = 50, db: Session = Depends(get_db)):
+        items = db.query(TrackModel).order_by(TrackModel.id).limit(limit + 1).all()
+        return build_page(items, limit, lambda track: (track.id,))
+
+    return app
+
+
+def measure(client: TestClient, url: str, requests: int) -> float:
+    for _ in range(min(50, requests)):
+        client.get(url)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url)
+        response.raise_for_status()
+    return requests / (time.perf_counter() - started)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    seed(args.rows)
+    client = TestClient(build_app())
+    legacy_url = f"/legacy/tracks?limit={args.rows}"
+    fast_url = f"/api/tracks?limit={args.rows}"
+    if client.get(legacy_url).json() != client.get(fast_url).json():
+        sys.exit("Responses differ between the two read paths")
+
+    legacy = measure(client, legacy_url, args.requests)
+    fast = measure(client, fast_url, args.requests)
+    print(f"rows per page:        {args.rows}")
+    print(f"ORM + response_model: {legacy:8.1f} req/s")
+    print(f"columns + orjson:     {fast:8.1f} req/s")
+    print(f"speed-up:             {fast / legacy:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
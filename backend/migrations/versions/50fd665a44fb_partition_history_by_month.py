@@ -0,0 +1,132 @@
+"""partition history by month
+
+Revision ID: 50fd665a44fb
+Revises: 60a9e7a38c76
+Create Date: 2026-10-18 12:26:09.731845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '50fd665a44fb'
+down_revision: Union[str, None] = '60a9e7a38c76'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONS_AHEAD = 3
+
+COLUMNS = 'id, user_id, track_id, title, artist, audio_url, cover_image, duration, played_at'
+
+COLUMN_DDL = """
+            id INTEGER NOT NULL DEFAULT nextval('history_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            track_id VARCHAR,
+            title VARCHAR,
+            artist VARCHAR,
+            audio_url VARCHAR,
+            cover_image VARCHAR,
+            duration INTEGER,"""
+
+
+def _create_history_indexes() -> None:
+    op.create_index('ix_history_id', 'history', ['id'])
+    op.create_index('ix_history_track_id', 'history', ['track_id'])
+    op.create_index(
+        'ix_history_user_id_played_at', 'history',
+        ['user_id', sa.text('played_at DESC'), sa.text('id DESC')],
+    )
+
+
+def _drop_history_indexes(table: str) -> None:
+    for name in ('ix_history_user_id_played_at', 'ix_history_track_id', 'ix_history_id'):
+        op.drop_index(name, table_name=table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.rename_table('history', 'history_unpartitioned')
+    op.execute('ALTER TABLE history_unpartitioned RENAME CONSTRAINT history_pkey TO history_unpartitioned_pkey')
+    _drop_history_indexes('history_unpartitioned')
+
+    # The partition key has to be part of the primary key, and rows without
+    # a played_at would have nowhere to go, so it becomes NOT NULL.
+    op.execute(
+        f"""
+        CREATE TABLE history ({COLUMN_DDL}
+            played_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+                DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, played_at)
+        ) PARTITION BY RANGE (played_at)
+        """
+    )
+    op.execute('ALTER SEQUENCE history_id_seq OWNED BY history.id')
+    op.execute('CREATE TABLE history_default PARTITION OF history DEFAULT')
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamp;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', coalesce(
+                        (SELECT min(played_at) FROM history_unpartitioned),
+                        now() AT TIME ZONE 'utc'
+                    )),
+                    date_trunc('month', now() AT TIME ZONE 'utc')
+                        + interval '{PARTITIONS_AHEAD} months',
+                    interval '1 month'
+                )
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF history FOR VALUES FROM (%L) TO (%L)',
+                    'history_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO history ({COLUMNS})
+        SELECT id, user_id, track_id, title, artist, audio_url, cover_image, duration,
+               coalesce(played_at, now() AT TIME ZONE 'utc')
+        FROM history_unpartitioned
+        """
+    )
+    op.drop_table('history_unpartitioned')
+    _create_history_indexes()
+    op.execute('ANALYZE history')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('ALTER SEQUENCE history_id_seq OWNED BY NONE')
+    op.rename_table('history', 'history_partitioned')
+    op.execute('ALTER TABLE history_partitioned RENAME CONSTRAINT history_pkey TO history_partitioned_pkey')
+    _drop_history_indexes('history_partitioned')
+    op.execute(
+        f"""
+        CREATE TABLE history ({COLUMN_DDL}
+            played_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute('ALTER SEQUENCE history_id_seq OWNED BY history.id')
+    op.execute(f'INSERT INTO history ({COLUMNS}) SELECT {COLUMNS} FROM history_partitioned')
+    op.execute('DROP TABLE history_partitioned CASCADE')
+    _create_history_indexes()
@@ -0,0 +1,57 @@
+"""add user access path indexes
+
+Revision ID: 60a9e7a38c76
+Revises: e3350af5734c
+Create Date: 2026-10-18 11:03:17.558021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '60a9e7a38c76'
+down_revision: Union[str, None] = 'e3350af5734c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_indexes(**kw) -> None:
+    op.create_index(
+        'ix_favorites_user_id_track_id', 'favorites', ['user_id', 'track_id'],
+        unique=True, **kw
+    )
+    op.create_index(
+        'ix_history_user_id_played_at', 'history',
+        ['user_id', sa.text('played_at DESC'), sa.text('id DESC')],
+        **kw
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The unique index cannot be built while double-tapped favorites exist.
+    op.execute(
+        'DELETE FROM favorites WHERE id NOT IN '
+        '(SELECT MIN(id) FROM favorites GROUP BY user_id, track_id)'
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+        with op.get_context().autocommit_block():
+            _create_indexes(postgresql_concurrently=True, if_not_exists=True)
+    else:
+        _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    kw = {}
+    if op.get_bind().dialect.name == 'postgresql':
+        kw = {'postgresql_concurrently': True, 'if_exists': True}
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_history_user_id_played_at', table_name='history', **kw)
+            op.drop_index('ix_favorites_user_id_track_id', table_name='favorites', **kw)
+    else:
+        op.drop_index('ix_history_user_id_played_at', table_name='history')
+        op.drop_index('ix_favorites_user_id_track_id', table_name='favorites')
@@ -0,0 +1,110 @@
+"""normalize track metadata
+
+Revision ID: 6afac087cd33
+Revises: 50fd665a44fb
+Create Date: 2026-10-18 13:48:52.106377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '6afac087cd33'
+down_revision: Union[str, None] = '50fd665a44fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+METADATA_COLUMNS = (
+    ('title', sa.String),
+    ('artist', sa.String),
+    ('audio_url', sa.String),
+    ('cover_image', sa.String),
+    ('duration', sa.Integer),
+)
+TABLES = ('favorites', 'history')
+
+
+def _restore_history_index() -> None:
+    # SQLite batch mode rebuilds the table from reflection, which drops the
+    # DESC ordering of the keyset index.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.drop_index('ix_history_user_id_played_at', table_name='history')
+    op.create_index(
+        'ix_history_user_id_played_at', 'history',
+        ['user_id', sa.text('played_at DESC'), sa.text('id DESC')],
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('track_metadata',
+        sa.Column('track_id', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('artist', sa.String(), nullable=True),
+        sa.Column('audio_url', sa.String(), nullable=True),
+        sa.Column('cover_image', sa.String(), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('track_id')
+    )
+
+    columns = ', '.join(name for name, _ in METADATA_COLUMNS)
+    for table in TABLES:
+        op.execute(f'DELETE FROM {table} WHERE track_id IS NULL')
+    # Each track keeps the metadata of its most recent play, falling back
+    # to the newest favorite for tracks that were never played.
+    op.execute(
+        f"""
+        INSERT INTO track_metadata (track_id, {columns}, updated_at)
+        SELECT track_id, {columns}, CURRENT_TIMESTAMP
+        FROM (
+            SELECT track_id, {columns},
+                   ROW_NUMBER() OVER (
+                       PARTITION BY track_id
+                       ORDER BY CASE WHEN seen_at IS NULL THEN 1 ELSE 0 END,
+                                seen_at DESC, source, id DESC
+                   ) AS position
+            FROM (
+                SELECT track_id, {columns}, played_at AS seen_at, 0 AS source, id
+                FROM history
+                UNION ALL
+                SELECT track_id, {columns}, NULL AS seen_at, 1 AS source, id
+                FROM favorites
+            ) AS copies
+        ) AS ranked
+        WHERE position = 1
+        """
+    )
+
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            for name, _ in METADATA_COLUMNS:
+                batch_op.drop_column(name)
+            batch_op.create_foreign_key(
+                f'fk_{table}_track_id_track_metadata', 'track_metadata',
+                ['track_id'], ['track_id'],
+            )
+    _restore_history_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(
+                f'fk_{table}_track_id_track_metadata', type_='foreignkey'
+            )
+            for name, type_ in METADATA_COLUMNS:
+                batch_op.add_column(sa.Column(name, type_(), nullable=True))
+        assignments = ', '.join(
+            f'{name} = (SELECT m.{name} FROM track_metadata m '
+            f'WHERE m.track_id = {table}.track_id)'
+            for name, _ in METADATA_COLUMNS
+        )
+        op.execute(f'UPDATE {table} SET {assignments}')
+    _restore_history_index()
+    op.drop_table('track_metadata')
@@ -0,0 +1,107 @@
+"""add catalog search index
+
+Revision ID: e3350af5734c
+Revises: 758f0d5e25a2
+Create Date: 2026-10-18 09:12:41.204519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e3350af5734c'
+down_revision: Union[str, None] = '758f0d5e25a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS_TABLES = {
+    'tracks': ('title', 'artist', 'genre'),
+    'albums': ('title', 'artist'),
+}
+
+
+def _upgrade_postgresql() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(
+        """
+        ALTER TABLE tracks ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(artist, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(genre, '')), 'C')
+        ) STORED
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE albums ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(artist, '')), 'B')
+        ) STORED
+        """
+    )
+    for table in ('tracks', 'albums'):
+        op.create_index(
+            f'ix_{table}_search_vector', table, ['search_vector'],
+            postgresql_using='gin',
+        )
+        for column in ('title', 'artist'):
+            op.create_index(
+                f'ix_{table}_{column}_trgm', table, [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+            )
+
+
+def _upgrade_sqlite() -> None:
+    for table, columns in SQLITE_FTS_TABLES.items():
+        fts = f'{table}_fts'
+        cols = ', '.join(columns)
+        new_values = ', '.join(f'new.{c}' for c in columns)
+        old_values = ', '.join(f'old.{c}' for c in columns)
+        insert = f'INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});'
+        delete = (
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', "
+            f"prefix='2 3')"
+        )
+        op.execute(f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END')
+        op.execute(f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END')
+        op.execute(
+            f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END'
+        )
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _upgrade_postgresql()
+    elif dialect == 'sqlite':
+        _upgrade_sqlite()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in ('tracks', 'albums'):
+            for column in ('title', 'artist'):
+                op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+            op.drop_index(f'ix_{table}_search_vector', table_name=table)
+            op.drop_column(table, 'search_vector')
+    elif dialect == 'sqlite':
+        for table in SQLITE_FTS_TABLES:
+            fts = f'{table}_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
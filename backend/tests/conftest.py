@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# app.database builds its engines at import time, so tests get a throwaway
+# SQLite database before anything under app/ is imported.
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ.setdefault("CATALOG_INDEX_ENABLED", "false")
+os.environ.setdefault("GENRE_ALBUMS_REFRESH_INTERVAL", "0")
+os.environ.setdefault("HISTORY_PARTITION_MAINTENANCE_INTERVAL", "0")
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth.auth import get_current_user
+from app.utils.auth import create_token_pair
+
+
+def _authorization(is_active: bool) -> str:
+    token = create_token_pair(7, "listener", is_active)["access_token"]
+    return f"Bearer {token}"
+
+
+def test_active_token_resolves_principal():
+    principal = asyncio.run(get_current_user(_authorization(True)))
+    assert (principal.id, principal.username, principal.is_active) == (7, "listener", True)
+
+
+def test_inactive_token_is_rejected():
+    authorization = _authorization(False)
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(get_current_user(authorization))
+        assert error.value.status_code == 401
+
+
+def test_refresh_resolves_principal_with_its_own_session():
+    from fastapi.testclient import TestClient
+
+    from app.database.database import SessionLocal, create_tables
+    from app.main import app
+    from app.models.user import User
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = User(username="refresher", email="refresher@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    refresh = create_token_pair(user_id, "refresher", True)["refresh_token"]
+    with TestClient(app) as client:
+        for _ in range(2):
+            response = client.post("/api/token/refresh", json={"refresh_token": refresh})
+            assert response.status_code == 200
+            assert response.json()["access_token"]
+
+
+def test_inactive_user_cannot_log_in():
+    from fastapi.testclient import TestClient
+
+    from app.database.database import SessionLocal, create_tables
+    from app.main import app
+    from app.models.user import User
+    from app.routes.users import get_password_hash
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        db.add(
+            User(
+                username="dormant",
+                email="dormant@example.com",
+                hashed_password=get_password_hash("secret"),
+                is_active=False,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/login", json={"username": "dormant", "password": "secret"}
+        )
+        assert response.status_code == 403
+        assert "access_token" not in response.json()
+
+        response = client.post(
+            "/api/login", json={"username": "dormant", "password": "wrong"}
+        )
+        assert response.status_code == 401
@@ -0,0 +1,96 @@
+import asyncio
+
+import fakeredis
+
+from app.utils.cache import CacheBackend, CacheNamespace, MemoryBackend, RedisBackend, ResponseCache
+
+
+def _redis_backend() -> RedisBackend:
+    return RedisBackend("redis://fake", client=fakeredis.aioredis.FakeRedis())
+
+
+class BrokenBackend(CacheBackend):
+    async def get(self, key):
+        raise ConnectionError("cache down")
+
+    async def set(self, key, value, ttl=None):
+        raise ConnectionError("cache down")
+
+    async def delete(self, key):
+        raise ConnectionError("cache down")
+
+    async def incr(self, key):
+        raise ConnectionError("cache down")
+
+
+def test_redis_namespace_get_set_with_ttl():
+    async def run():
+        backend = _redis_backend()
+        namespace = CacheNamespace("tracks", backend)
+        await namespace.set("1", b"one", ttl=0.05)
+        await namespace.set("2", b"two")
+        assert await namespace.get("1") == b"one"
+        assert 0 < await backend._client.pttl(await namespace.key("1")) <= 50
+        assert await backend._client.pttl(await namespace.key("2")) == -1
+        await asyncio.sleep(0.1)
+        assert await namespace.get("1") is None
+        assert await namespace.get("2") == b"two"
+        await backend.close()
+
+    asyncio.run(run())
+
+
+def test_version_bump_invalidates_other_workers():
+    async def run():
+        backend = _redis_backend()
+        # Two namespaces over one client stand in for two app workers.
+        writer = CacheNamespace("albums", backend, version_refresh=0)
+        reader = CacheNamespace("albums", backend, version_refresh=0)
+        other = CacheNamespace("tracks", backend, version_refresh=0)
+        await writer.set("1", b"old")
+        await other.set("1", b"kept")
+        assert await reader.get("1") == b"old"
+
+        await writer.invalidate_all()
+        assert await reader.get("1") is None
+        assert await reader.key("1") == "playpod:albums:v1:1"
+        assert await other.get("1") == b"kept"
+        await backend.close()
+
+    asyncio.run(run())
+
+
+def test_response_cache_degrades_when_backend_raises():
+    async def run():
+        cache = ResponseCache(CacheNamespace("broken", BrokenBackend()))
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {"id": 1}
+
+        assert await cache.get_or_fetch("1", fetch, ttl=60) == {"id": 1}
+        assert await cache.get_or_fetch("1", fetch, ttl=60) == {"id": 1}
+        stats = cache.stats()
+        assert len(calls) == 2
+        assert stats["misses"] == 2
+        assert stats["backend_errors"] == 4
+
+    asyncio.run(run())
+
+
+def test_memory_backend_never_evicts_namespace_versions():
+    async def run():
+        backend = MemoryBackend(max_entries=2, max_bytes=1024)
+        namespace = CacheNamespace("tracks", backend, version_refresh=0)
+        await namespace.set("stale", b"before")
+        await namespace.invalidate_all()
+        for key in range(10):
+            await namespace.set(str(key), b"x")
+
+        assert await namespace.key("stale") == "playpod:tracks:v1:stale"
+        await backend.set("playpod:tracks:v0:stale", b"before")
+        assert await namespace.get("stale") is None
+        assert backend.stats()["entries"] == 2
+
+    asyncio.run(run())
@@ -0,0 +1,94 @@
+import threading
+
+from app.utils.catalog_index import KIND_DEEZER_TRACK, KIND_TRACK, CatalogIndex
+
+
+def _settle(index: CatalogIndex) -> None:
+    if index._compaction is not None:
+        index._compaction.join()
+
+
+def _chart(index: CatalogIndex, refreshes: int) -> None:
+    for _ in range(refreshes):
+        for track_id in range(10):
+            index.add(KIND_DEEZER_TRACK, track_id, f"Chart Hit {track_id}", "Artist")
+
+
+def test_unchanged_readds_do_not_tombstone():
+    index = CatalogIndex()
+    _chart(index, 600)
+
+    stats = index.stats()
+    assert stats["documents"] == 10
+    assert stats["tombstones"] == 0
+    assert stats["postings"] == 10 * 4
+    assert len(index.search("chart", limit=20)) == 10
+    assert len(index.search("hit", limit=20)) == 10
+
+
+def test_changed_readds_are_compacted():
+    index = CatalogIndex()
+    for version in range(600):
+        for track_id in range(10):
+            index.add(KIND_DEEZER_TRACK, track_id, f"Chart Hit v{version}", "Artist")
+    _settle(index)
+
+    stats = index.stats()
+    assert stats["documents"] == 10
+    assert stats["tombstones"] <= 1000
+    assert len(index._entity_ids) == 10 + stats["tombstones"]
+    assert stats["postings"] <= 4 * len(index._entity_ids)
+    assert len(index.search("chart", limit=20)) == 10
+    assert index.search("v0") == []
+
+
+def test_compaction_keeps_documents_searchable():
+    index = CatalogIndex()
+    for track_id in range(3000):
+        index.add(KIND_TRACK, track_id, f"Song {track_id}", f"Band {track_id % 7}")
+    for track_id in range(0, 3000, 2):
+        index.remove(KIND_TRACK, track_id)
+    _settle(index)
+
+    assert index.stats()["tombstones"] < 1000
+    assert len(index._entity_ids) < 3000
+    [hit] = index.search("song 2999")[:1]
+    assert (hit["id"], hit["title"], hit["artist"]) == (2999, "Song 2999", "Band 3")
+    assert all(result["id"] % 2 for result in index.search("band", limit=100))
+    index.remove(KIND_TRACK, 2999)
+    assert all(result["id"] != 2999 for result in index.search("song 2999"))
+
+
+def test_compaction_rebuilds_without_holding_the_lock():
+    index = CatalogIndex()
+    for track_id in range(20):
+        index.add(KIND_TRACK, track_id, f"Song {track_id}", "Band")
+    for track_id in range(10):
+        index.remove(KIND_TRACK, track_id)
+
+    build = CatalogIndex._compacted
+    observed = {}
+
+    def compacted(*snapshot):
+        # Runs while the rebuild is in flight: the lock must be free, and
+        # these writes land on the old index and have to be replayed.
+        def try_lock():
+            observed["free"] = index._lock.acquire(blocking=False)
+            if observed["free"]:
+                index._lock.release()
+
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        index.add(KIND_TRACK, 100, "Song 100", "Band")
+        index.remove(KIND_TRACK, 15)
+        return build(*snapshot)
+
+    index._compacted = compacted
+    index.compact()
+
+    assert observed["free"]
+    stats = index.stats()
+    assert (stats["documents"], stats["tombstones"]) == (10, 1)
+    ids = {hit["id"] for hit in index.search("song", limit=50)}
+    assert ids == {10, 11, 12, 13, 14, 16, 17, 18, 19, 100}
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import CompressedBodyCache, CompressionMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=100,
+        cache=CompressedBodyCache(1 << 20),
+        offload_size=10_000,
+    )
+
+    @app.get("/text/{size}")
+    def text(size: int):
+        return PlainTextResponse("a" * size)
+
+    @app.get("/binary")
+    def binary():
+        return PlainTextResponse("a" * 1000, media_type="application/octet-stream")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "size, accept",
+    [(1000, "gzip"), (10, "gzip"), (1000, "identity")],
+    ids=["compressed", "too-small", "not-accepted"],
+)
+def test_compressible_responses_always_vary(client, size, accept):
+    response = client.get(f"/text/{size}", headers={"Accept-Encoding": accept})
+    assert response.text == "a" * size
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_other_content_types_do_not_vary(client):
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+
+def test_large_bodies_compress_off_the_event_loop(client, monkeypatch):
+    threads = []
+
+    def compress(encoding, body):
+        threads.append(threading.current_thread())
+        return compression.gzip.compress(body, mtime=0)
+
+    monkeypatch.setattr(compression, "compress", compress)
+    small = client.get("/text/1000", headers={"Accept-Encoding": "gzip"})
+    large = client.get("/text/50000", headers={"Accept-Encoding": "gzip"})
+    assert small.text == "a" * 1000
+    assert large.text == "a" * 50000
+    assert large.headers["content-encoding"] == "gzip"
+    # The small body compresses on the loop's thread, the large one does not.
+    assert threads[0] is not threads[1]
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.utils.concurrency import gather_with_deadline
+
+
+def test_deadline_splits_results_and_timeouts():
+    async def quick():
+        return "quick"
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    results, errors = asyncio.run(
+        gather_with_deadline({"quick": quick(), "slow": slow()}, timeout=0.05)
+    )
+    assert results == {"quick": "quick"}
+    assert isinstance(errors["slow"], asyncio.TimeoutError)
+
+
+def test_cancelled_caller_cancels_its_calls():
+    cancelled = []
+
+    async def upstream(name):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def run():
+        request = asyncio.ensure_future(
+            gather_with_deadline({"a": upstream("a"), "b": upstream("b")}, timeout=5)
+        )
+        await asyncio.sleep(0.01)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert sorted(cancelled) == ["a", "b"]
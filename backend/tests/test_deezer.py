@@ -0,0 +1,149 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils import deezer
+from app.utils.resilience import BreakerRegistry, RetryBudget, TokenBucket
+
+
+class Upstream:
+    def __init__(self):
+        self.responses = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if self.responses:
+            return self.responses.pop(0)
+        return httpx.Response(200, json={"id": 1, "title": "Album"})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = Upstream()
+    monkeypatch.setattr(
+        deezer, "deezer_breakers", BreakerRegistry(failure_threshold=1, recovery_timeout=0)
+    )
+    monkeypatch.setattr(
+        deezer, "deezer_retry_budget", RetryBudget(min_per_second=0, max_tokens=0)
+    )
+    monkeypatch.setattr(deezer, "deezer_rate_limiter", TokenBucket(1000, 1000))
+    client = httpx.AsyncClient(
+        base_url="https://api.deezer.test", transport=httpx.MockTransport(upstream.handler)
+    )
+    monkeypatch.setattr(deezer, "_client", client)
+    return upstream
+
+
+def _call(path: str):
+    async def run():
+        try:
+            return await deezer._get(path)
+        except Exception as e:
+            return e
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        httpx.Response(200, text="<html>maintenance</html>"),
+        httpx.Response(200, json={"error": "quota"}),
+    ],
+)
+def test_malformed_trial_response_settles_the_breaker(upstream, response):
+    upstream.responses = [httpx.Response(503), response]
+    assert isinstance(_call("/album/1"), Exception)
+    breaker = deezer.deezer_breakers.get("/album/{id}")
+    assert breaker.state == "open"
+
+    # recovery_timeout=0: the next call is the half-open trial.
+    assert isinstance(_call("/album/1"), Exception)
+    assert breaker.trials <= 1 and breaker.state != "half_open"
+
+    assert _call("/album/1") == {"id": 1, "title": "Album"}
+    assert breaker.state == "closed"
+
+
+def test_non_json_response_is_a_bad_gateway(upstream):
+    from app.routes.deezer import _upstream_error
+
+    upstream.responses = [httpx.Response(200, text="<html>maintenance</html>")]
+    error = _call("/album/2")
+    assert isinstance(error, deezer.DeezerAPIError)
+    assert _upstream_error(error).status_code == 502
+
+
+def _search(monkeypatch, tracks, albums):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.routes import deezer as routes
+
+    async def leg(outcome):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(routes, "search_deezer_tracks", lambda q, limit: leg(tracks))
+    monkeypatch.setattr(routes, "search_deezer_albums", lambda q, limit: leg(albums))
+    with TestClient(app) as client:
+        return client.get("/api/deezer/search", params={"q": "abba"})
+
+
+def test_degraded_search_is_not_cached(monkeypatch):
+    response = _search(monkeypatch, [{"id": 1}], deezer.DeezerAPIError("albums down"))
+    assert response.status_code == 200
+    assert response.json()["data"]["degraded"] == ["albums"]
+    assert response.headers["cache-control"] == "no-store"
+
+    response = _search(monkeypatch, [{"id": 1}], [{"id": 2}])
+    assert "no-store" not in response.headers["cache-control"]
+
+
+def test_failed_search_keeps_retry_after(monkeypatch):
+    response = _search(
+        monkeypatch,
+        deezer.DeezerUnavailable("circuit open", 12),
+        deezer.DeezerAPIError("albums down"),
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "12"
+
+    response = _search(
+        monkeypatch, deezer.DeezerAPIError("down"), deezer.DeezerAPIError("down")
+    )
+    assert response.status_code == 502
+
+
+def test_unknown_genre_albums_are_cached_and_coalesced(monkeypatch):
+    from app.utils.cache import CacheNamespace, MemoryBackend, ResponseCache
+
+    calls = []
+
+    async def radio_tracks(genre_id, limit=50):
+        calls.append(genre_id)
+        await asyncio.sleep(0.01)
+        return [
+            {"id": i, "title": f"Song {i}", "artist": {"name": f"Band {i % 3}"}, "album": {}}
+            for i in range(30)
+        ]
+
+    monkeypatch.setattr(deezer, "get_tracks_by_genre", radio_tracks)
+    monkeypatch.setattr(
+        deezer,
+        "deezer_cache",
+        ResponseCache(CacheNamespace("genre-test", MemoryBackend(100, 1 << 20))),
+    )
+
+    async def run():
+        first = await asyncio.gather(
+            *(deezer._get_custom_genre_albums("polka") for _ in range(5))
+        )
+        again = await deezer._get_custom_genre_albums("polka")
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert calls == [0]
+    assert all(albums == again for albums in first)
+    assert again
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.utils import history_writer as module
+from app.utils.history_writer import HistoryBatchTooLarge, HistoryWriter
+
+
+def _rows(count: int, start: int = 0):
+    return [{"user_id": 1, "track_id": str(start + i)} for i in range(count)]
+
+
+def test_stop_lets_a_running_flush_commit(monkeypatch):
+    written = []
+    cancelled = []
+
+    async def slow_write(rows):
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            cancelled.append(rows)
+            raise
+        written.extend(rows)
+
+    monkeypatch.setattr(module, "write_history_rows", slow_write)
+
+    async def run():
+        writer = HistoryWriter(batch_size=10, flush_interval=60)
+        writer.start()
+        await writer.enqueue(_rows(10))
+        await asyncio.sleep(0.01)
+        await writer.enqueue(_rows(5, start=10))
+        await writer.stop()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert cancelled == []
+    assert len(written) == 15
+    assert stats["written"] == 15
+    assert stats["pending"] == 0
+    assert stats["dropped"] == 0
+
+
+def test_failing_batch_is_dropped_after_max_attempts(monkeypatch):
+    written = []
+
+    async def write(rows):
+        if any(row["track_id"] == "poison" for row in rows):
+            raise RuntimeError("constraint violation")
+        written.extend(rows)
+
+    monkeypatch.setattr(module, "write_history_rows", write)
+
+    async def run():
+        writer = HistoryWriter(batch_size=2, flush_interval=60, max_flush_attempts=3)
+        writer.start()
+        await writer.enqueue([{"user_id": 1, "track_id": "poison"}, *_rows(3)])
+        for _ in range(3):
+            await writer.flush()
+        stats = writer.stats()
+        await writer.stop()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["flush_errors"] == 3
+    assert stats["dropped"] == 2
+    assert stats["written"] == 2
+    assert stats["pending"] == 0
+    assert [row["track_id"] for row in written] == ["1", "2"]
+
+
+def test_oversized_batch_is_rejected():
+    async def run():
+        writer = HistoryWriter(max_pending=3)
+        writer.start()
+        try:
+            with pytest.raises(HistoryBatchTooLarge):
+                await writer.enqueue(_rows(4))
+        finally:
+            await writer.stop()
+
+    asyncio.run(run())
+
+
+def test_write_behind_play_is_accepted_without_id(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.database.database import SessionLocal, create_tables
+    from app.main import app
+    from app.models.user import User
+    from app.routes import history as routes
+    from app.utils.auth import create_token_pair
+
+    class BufferingWriter:
+        running = True
+
+        def __init__(self):
+            self.rows = []
+
+        async def enqueue(self, rows):
+            self.rows.extend(rows)
+
+    writer = BufferingWriter()
+    monkeypatch.setattr(routes, "history_writer", writer)
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = User(username="behind", email="behind@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        token = create_token_pair(user.id, "behind", True)["access_token"]
+    finally:
+        db.close()
+
+    play = {
+        "track_id": "behind1",
+        "title": "Track",
+        "artist": "Artist",
+        "audio_url": "https://cdn.example.com/behind1.mp3",
+        "duration": 200,
+    }
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/history", json=play, headers={"Authorization": f"Bearer {token}"}
+        )
+        schema = client.get("/openapi.json").json()
+
+    assert response.status_code == 202
+    assert "id" not in response.json()
+    assert response.json()["track_id"] == "behind1"
+    assert len(writer.rows) == 1
+    accepted = schema["paths"]["/api/history"]["post"]["responses"]["202"]
+    assert accepted["content"]["application/json"]["schema"]["$ref"].endswith(
+        "/HistoryAccepted"
+    )
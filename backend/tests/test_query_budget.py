@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database.database import SessionLocal, create_tables
+from app.main import app
+from app.models.album import Album
+from app.models.favorite import Favorite
+from app.models.history import History
+from app.models.track import Track
+from app.models.track_metadata import TrackMetadata
+from app.models.user import User
+from app.utils.auth import create_token_pair
+from app.utils.query_counter import query_budget
+
+ALBUMS = 20
+TRACKS_PER_ALBUM = 10
+
+NEW_FAVORITE = {
+    "track_id": "budget900",
+    "title": "New",
+    "artist": "Artist",
+    "audio_url": "https://cdn.example.com/900.mp3",
+    "cover_image": "https://cdn.example.com/900.jpg",
+    "duration": 200,
+}
+
+# (method, path, json body, query budget); {album_id} is a seeded album.
+BUDGETS = [
+    ("GET", "/api/tracks?limit=100", None, 1),
+    ("GET", "/api/albums?limit=20", None, 1),
+    ("GET", "/api/albums?limit=20&include=tracks", None, 2),
+    ("GET", "/api/albums/{album_id}", None, 2),
+    ("GET", "/api/search?q=track", None, 2),
+    ("GET", "/api/favorites", None, 1),
+    ("GET", "/api/history?limit=50", None, 1),
+    ("POST", "/api/favorites", NEW_FAVORITE, 2),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    # Enough rows per relationship that a lazy load per row (an N+1)
+    # shows up as a budget overrun.
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = User(username="budget", email="budget@example.com", hashed_password="x")
+        db.add(user)
+        albums = []
+        for a in range(ALBUMS):
+            album = Album(title=f"Album {a}", artist=f"Artist {a}")
+            album.tracks = [
+                Track(
+                    title=f"Track {a}-{t}",
+                    artist=f"Artist {a}",
+                    genre="pop",
+                    audio_url=f"https://cdn.example.com/{a}-{t}.mp3",
+                    duration=180.0,
+                )
+                for t in range(TRACKS_PER_ALBUM)
+            ]
+            db.add(album)
+            albums.append(album)
+        db.flush()
+        for t in range(50):
+            db.add(TrackMetadata(track_id=f"budget{t}", title=f"Track {t}", artist="Artist"))
+        db.flush()
+        for t in range(50):
+            db.add(Favorite(user_id=user.id, track_id=f"budget{t}"))
+            db.add(History(user_id=user.id, track_id=f"budget{t}"))
+        db.commit()
+        token = create_token_pair(user.id, "budget", True)["access_token"]
+        return {"Authorization": f"Bearer {token}"}, albums[0].id
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize(
+    "method, path, body, budget", BUDGETS, ids=[f"{m} {p}" for m, p, _, _ in BUDGETS]
+)
+def test_route_stays_within_query_budget(seeded, method, path, body, budget):
+    headers, album_id = seeded
+    with TestClient(app) as client:
+        # QueryBudgetExceeded lists the statements that blew the budget.
+        with query_budget(budget, f"{method} {path}"):
+            response = client.request(
+                method, path.format(album_id=album_id), json=body, headers=headers
+            )
+    response.raise_for_status()
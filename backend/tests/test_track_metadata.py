@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+
+from app.database.database import SessionLocal, create_tables
+from app.main import app
+from app.models.track_metadata import TrackMetadata
+from app.models.user import User
+from app.utils.auth import create_token_pair
+from app.utils.track_metadata import refresh_track_metadata_from_deezer
+
+
+def _headers(username: str) -> dict:
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = User(username=username, email=f"{username}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        token = create_token_pair(user.id, username, True)["access_token"]
+    finally:
+        db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _track(track_id: str, title: str) -> dict:
+    return {
+        "track_id": track_id,
+        "title": title,
+        "artist": "Artist",
+        "audio_url": f"https://cdn.example.com/{track_id}.mp3",
+        "cover_image": f"https://cdn.example.com/{track_id}.jpg",
+        "duration": 200,
+    }
+
+
+def test_client_payloads_cannot_rewrite_shared_metadata():
+    owner, other = _headers("meta_owner"), _headers("meta_other")
+    with TestClient(app) as client:
+        client.post("/api/favorites", json=_track("4242", "Original"), headers=owner)
+        response = client.post("/api/history", json=_track("4242", "HACKED"), headers=other)
+        assert response.status_code in (201, 202)
+        favorites = client.get("/api/favorites", headers=owner).json()
+
+    assert [favorite["title"] for favorite in favorites] == ["Original"]
+
+
+def test_deezer_fetch_refreshes_existing_metadata_only():
+    owner = _headers("meta_refresh")
+    with TestClient(app) as client:
+        client.post("/api/favorites", json=_track("4343", "Old title"), headers=owner)
+        # The portal runs on the app's loop, which owns the pooled connections.
+        for track_id in (4343, 4344):
+            client.portal.call(
+                refresh_track_metadata_from_deezer,
+                {
+                    "id": track_id,
+                    "title": "Deezer title",
+                    "artist": {"name": "Deezer artist"},
+                    "preview": f"https://cdns-preview.dzcdn.net/{track_id}.mp3",
+                    "album": {"cover_small": f"https://e-cdns-images.dzcdn.net/{track_id}.jpg"},
+                    "duration": 201,
+                },
+            )
+
+    db = SessionLocal()
+    try:
+        refreshed = db.get(TrackMetadata, "4343")
+        assert (refreshed.title, refreshed.artist, refreshed.duration) == (
+            "Deezer title",
+            "Deezer artist",
+            201,
+        )
+        assert db.get(TrackMetadata, "4344") is None
+    finally:
+        db.close()
@@ -104,7 +104,7 @@ function Albums() {
             timeout: 5000
           });
           
-          if (!response.data || response.data.length === 0) {
+          if (!response.data?.items || response.data.items.length === 0) {
             response = await apiService.getCustomAlbums(null, 15);
           }
         } catch (err) {
@@ -112,7 +112,7 @@ function Albums() {
         }
       }
       
-      setAlbums(response.data.data || response.data);
+      setAlbums(response.data.items || response.data.data || response.data);
       setLoading(false);
     } catch (err) {
       console.error('Error fetching albums:', err);
@@ -34,7 +34,7 @@ function History({ setCurrentTrack }) {
       try {
         if (authService.isLoggedIn()) {
           const response = await apiService.getHistory();
-          setHistory(response.data || []);
+          setHistory(response.data?.items || response.data || []);
         } else {
           const localHistory = JSON.parse(localStorage.getItem('listeningHistory') || '[]');
           setHistory(localHistory);
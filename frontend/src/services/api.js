@@ -42,6 +42,29 @@ api.interceptors.response.use(
       return Promise.reject(error);
     }
 
+    const storedUser = JSON.parse(localStorage.getItem('user'));
+    if (
+      error.response?.status === 401 &&
+      storedUser?.refreshToken &&
+      !config.refreshed &&
+      !config.url.includes('/token/refresh')
+    ) {
+      config.refreshed = true;
+      try {
+        const response = await api.post('/token/refresh', {
+          refresh_token: storedUser.refreshToken,
+        });
+        localStorage.setItem('user', JSON.stringify({
+          ...storedUser,
+          token: response.data.access_token,
+          refreshToken: response.data.refresh_token,
+        }));
+        return api(config);
+      } catch (refreshError) {
+        return Promise.reject(error);
+      }
+    }
+
     const shouldRetry = (
       !error.response || 
       (error.response.status >= 500 && error.response.status <= 599)
@@ -71,6 +94,7 @@ const apiService = {
         localStorage.setItem('user', JSON.stringify({ 
           username: credentials.username,
           token: response.data.access_token,
+          refreshToken: response.data.refresh_token,
           isLoggedIn: true 
         }));
       }
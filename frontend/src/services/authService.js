@@ -10,6 +10,7 @@ const authService = {
         const userData = { 
           username: credentials.username,
           token: response.data.access_token,
+          refreshToken: response.data.refresh_token,
           isLoggedIn: true 
         };
         localStorage.setItem(TOKEN_KEY, JSON.stringify(userData));